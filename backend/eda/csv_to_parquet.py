@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# ----------------------------
+# Paths
+# ----------------------------
+EDA_DIR = Path(__file__).parent
+EDA_CSV = EDA_DIR / "eda.csv"
+EDA_PARQUET = EDA_DIR / "eda.parquet"
+
+# Low-cardinality text columns: read as dictionary arrays (Categoricals in pandas)
+CATEGORY_COLUMNS = ["Incident_City", "Primary_Impression", "Where_Patient_was_Transported", "Place_Incident_Happened"]
+# Kept as the raw "YYYY-MM-DD HH:MM:SS" strings (Arrow would infer timestamps)
+TIME_COLUMNS = [
+    "Time_Call_Was_Received",
+    "Time_Vehicle_was_Dispatched",
+    "Time_Arrived_on_Scene",
+    "Time_Arrived_at_Patient",
+    "Time_Departed_from_the_Scene",
+]
+
+
+# ----------------------------
+# Readers
+# ----------------------------
+def read_eda_csv(path=EDA_CSV, columns=None) -> pa.Table:
+    # Arrow's multithreaded CSV reader with the API's column types
+    return pa_csv.read_csv(
+        path,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={
+                **{c: pa.dictionary(pa.int32(), pa.string()) for c in CATEGORY_COLUMNS},
+                **{c: pa.string() for c in TIME_COLUMNS},
+            },
+            include_columns=columns,
+        ),
+    )
+
+
+def load_eda_table(columns=None, csv_path=EDA_CSV) -> pa.Table:
+    """
+    The .parquet beside csv_path when it's at least as new as the CSV
+    (memory-mapped, column types stored in the file), otherwise a fresh
+    parse of the CSV. columns limits the read to those columns.
+    """
+    parquet_path = csv_path.with_suffix(".parquet")
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+        return pq.read_table(parquet_path, columns=columns, memory_map=True)
+    return read_eda_csv(csv_path, columns)
+
+
+# ----------------------------
+# Convert
+# ----------------------------
+def main():
+    table = read_eda_csv()
+    pq.write_table(table, EDA_PARQUET, compression="zstd")
+    print(f"[OK] Wrote {EDA_PARQUET} ({table.num_rows} rows, {table.num_columns} columns)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,76 @@
+from itertools import chain
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Polygon
-import h3  # make sure your version supports latlng_to_cell
+import shapely
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import orjson
+import h3.api.numpy_int as h3  # cells are uint64 ints, not hex strings
+from h3 import H3LatLngDomainError
+
+try:
+    import ctypes
+    import numba
+    from h3._cy import latlng as _h3_latlng
+
+    # The h3 C library is linked into h3-py's extension modules, so its
+    # latLngToCell(const LatLng *, int res, H3Index *out) can be called
+    # directly (and without the GIL) from nopython code.
+    _c_latlng_to_cell = ctypes.CDLL(_h3_latlng.__file__).latLngToCell
+    _c_latlng_to_cell.restype = ctypes.c_uint32
+    _c_latlng_to_cell.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p]
+
+    @numba.njit(parallel=True)
+    def _latlng_to_cell_kernel(coords_rad, resolution, out, err):
+        # coords_rad is a C-contiguous (n, 2) float64 array laid out like
+        # h3's LatLng struct; out is uint64, err holds the H3Error codes.
+        in_ptr = coords_rad.ctypes.data
+        out_ptr = out.ctypes.data
+        for i in numba.prange(coords_rad.shape[0]):
+            err[i] = _c_latlng_to_cell(in_ptr + i * 16, resolution, out_ptr + i * 8)
+
+    _HAS_NUMBA = True
+except Exception:
+    _HAS_NUMBA = False
+
+# eda.csv timestamps, e.g. "2021-01-02 17:22:00"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Columns the engine and its downstream readers (hotspot table, API) use
+INCIDENT_COLUMNS = [
+    "Incident_Number",
+    "Incident_Latitude",
+    "Incident_Longitude",
+    "Time_Arrived_on_Scene",
+    "Time_Departed_from_the_Scene",
+    "Incident_City",
+]
+INCIDENT_DTYPES = {
+    "Incident_Number": "string",
+    # float64 kept on purpose: float32 rounding can move points across H3 cells
+    "Incident_Latitude": "float64",
+    "Incident_Longitude": "float64",
+    "Incident_City": "category",
+}
 
 # =======================================================
 # Load data
 # =======================================================
 def load_incidents(path):
     print("[1] Loading incidents...")
-    df = pd.read_csv(path)
-
-    if "Incident_Latitude" not in df or "Incident_Longitude" not in df:
+    header = pd.read_csv(path, nrows=0).columns
+    if "Incident_Latitude" not in header or "Incident_Longitude" not in header:
         raise ValueError("Dataset must contain Incident_Latitude and Incident_Longitude.")
 
+    # Parse only the needed columns, with Arrow's multithreaded reader
+    df = pd.read_csv(
+        path,
+        usecols=INCIDENT_COLUMNS,
+        dtype=INCIDENT_DTYPES,
+        engine="pyarrow"
+    )
+
     return df
 
 # =======================================================
@@ -21,14 +79,19 @@ def load_incidents(path):
 def compute_on_scene_time(df):
     print("[2] Computing on-scene time...")
 
-    df["Time_Arrived_on_Scene"] = pd.to_datetime(df["Time_Arrived_on_Scene"])
-    df["Time_Departed_from_the_Scene"] = pd.to_datetime(df["Time_Departed_from_the_Scene"])
+    # Explicit format skips per-string format inference; cache=True parses
+    # each distinct timestamp once.
+    arrived = pd.to_datetime(
+        df["Time_Arrived_on_Scene"], format=TIMESTAMP_FORMAT, cache=True
+    ).to_numpy()
+    departed = pd.to_datetime(
+        df["Time_Departed_from_the_Scene"], format=TIMESTAMP_FORMAT, cache=True
+    ).to_numpy()
 
-    df["on_scene_time_min"] = (
-        df["Time_Departed_from_the_Scene"] - df["Time_Arrived_on_Scene"]
-    ).dt.total_seconds() / 60
-
-    df["on_scene_time_min"] = df["on_scene_time_min"].clip(lower=0, upper=200)
+    # One subtract/divide pass on the datetime64 arrays, clipped in place
+    minutes = (departed - arrived) / np.timedelta64(1, "m")
+    np.clip(minutes, 0, 200, out=minutes)
+    df["on_scene_time_min"] = minutes
 
     return df
 
@@ -38,14 +101,40 @@ def compute_on_scene_time(df):
 def add_h3(df, resolution=8):
     print("[3] Adding H3 hex indices...")
 
-    df["h3"] = df.apply(
-        lambda r: h3.latlng_to_cell(
-            r["Incident_Latitude"],
-            r["Incident_Longitude"],
-            resolution
-        ),
-        axis=1
-    )
+    lats = df["Incident_Latitude"].to_numpy(np.float64)
+    lons = df["Incident_Longitude"].to_numpy(np.float64)
+
+    # Incidents repeat at the same addresses/stations, so encode each distinct
+    # (lat, lon) once and gather back. complex128 packs the pair into a single
+    # hashable value for factorize.
+    codes, uniq = pd.factorize(lats + 1j * lons, sort=False)
+    # factorize codes NaN coordinates -1, which would index the last cell;
+    # reject them the way h3.latlng_to_cell does per incident
+    if (codes < 0).any():
+        raise H3LatLngDomainError(f"{int((codes < 0).sum())} incidents have invalid coordinates.")
+    lats, lons = uniq.real, uniq.imag
+
+    if _HAS_NUMBA:
+        # Parallel nopython loop straight into the h3 C library
+        coords_rad = np.ascontiguousarray(np.radians(np.column_stack([lats, lons])))
+        cells = np.zeros(len(lats), dtype=np.uint64)
+        err = np.zeros(len(lats), dtype=np.uint32)
+        _latlng_to_cell_kernel(coords_rad, resolution, cells, err)
+        if err.any():
+            raise H3LatLngDomainError(f"{int(err[codes].astype(bool).sum())} incidents have invalid coordinates.")
+    else:
+        # Iterate over the raw float arrays instead of df.apply(axis=1),
+        # which builds a row Series for every incident.
+        cells = np.array([
+            h3.latlng_to_cell(lat, lon, resolution)
+            for lat, lon in zip(lats.tolist(), lons.tolist())
+        ], dtype=np.uint64)
+
+    # Store as a Categorical over the sorted distinct cells: the codes come
+    # from factorizing the U unique locations rather than all N incidents,
+    # and compute_h3_aggregates groups on them directly.
+    cell_codes, cell_ids = pd.factorize(cells, sort=True)
+    df["h3"] = pd.Categorical.from_codes(cell_codes[codes], categories=cell_ids)
 
     return df
 
@@ -55,28 +144,100 @@ def add_h3(df, resolution=8):
 def compute_h3_aggregates(df):
     print("[4] Computing H3 aggregates...")
 
-    agg = df.groupby("h3").agg(
-        incidents=("Incident_Number", "count"),
-        avg_on_scene=("on_scene_time_min", "mean"),
-        min_on_scene=("on_scene_time_min", "min"),
-        max_on_scene=("on_scene_time_min", "max"),
-    ).reset_index()
+    # Compute every statistic from one set of integer cell codes instead of
+    # one GroupBy scan per aggregation. add_h3 stores the cells as a
+    # Categorical over sorted ids; plain uint64 columns are factorized.
+    if isinstance(df["h3"].dtype, pd.CategoricalDtype):
+        codes = df["h3"].cat.codes.to_numpy()
+        cells = df["h3"].cat.categories.to_numpy()
+    else:
+        codes, cells = pd.factorize(df["h3"].to_numpy(), sort=True)
+    n = len(cells)
+    scene = df["on_scene_time_min"].to_numpy(np.float64)
+    valid = ~np.isnan(scene)
 
-    return agg
+    incidents = np.bincount(codes, weights=df["Incident_Number"].notna().to_numpy(), minlength=n)
+    scene_count = np.bincount(codes[valid], minlength=n)
+    scene_sum = np.bincount(codes[valid], weights=scene[valid], minlength=n)
+
+    # fmin/fmax skip NaN the same way GroupBy min/max do
+    min_on_scene = np.full(n, np.nan)
+    max_on_scene = np.full(n, np.nan)
+    np.fmin.at(min_on_scene, codes, scene)
+    np.fmax.at(max_on_scene, codes, scene)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_on_scene = scene_sum / scene_count
+
+    # Cells are sorted, so rows come out in the same order as groupby("h3");
+    # categories with no rows are dropped, like observed=True.
+    agg = pd.DataFrame({
+        "h3": cells,
+        "incidents": incidents.astype(np.int64),
+        "avg_on_scene": avg_on_scene,
+        "min_on_scene": min_on_scene,
+        "max_on_scene": max_on_scene,
+    })
+
+    return agg[np.bincount(codes, minlength=n) > 0].reset_index(drop=True)
 
 # =======================================================
 # Add polygon geometry from H3 cell
 # =======================================================
 def add_hex_geometry(agg):
-    def hex_to_poly(h):
-        # H3 returns list of (lat, lon)
-        boundary = h3.cell_to_boundary(h)
-        coords = [(lon, lat) for lat, lon in boundary]
-        return Polygon(coords)
+    # H3 returns list of (lat, lon); hexagons have 6 vertices, pentagons 5
+    boundaries = [h3.cell_to_boundary(h) for h in agg["h3"].tolist()]
+    lengths = np.fromiter(map(len, boundaries), dtype=np.intp, count=len(boundaries))
 
-    agg["geometry"] = agg["h3"].apply(hex_to_poly)
+    # Stream every coordinate straight into one float64 buffer rather than
+    # building an intermediate list of vertex tuples
+    latlng = np.fromiter(
+        chain.from_iterable(chain.from_iterable(boundaries)),
+        dtype=np.float64,
+        count=2 * int(lengths.sum())
+    ).reshape(-1, 2)
+
+    # Build every ring in one GEOS call, swapping to (lon, lat) with a view
+    rings = shapely.linearrings(
+        latlng[:, ::-1],
+        indices=np.repeat(np.arange(len(boundaries)), lengths)
+    )
+    agg["geometry"] = shapely.polygons(rings)
     return gpd.GeoDataFrame(agg, geometry="geometry", crs="EPSG:4326")
 
+# =======================================================
+# Stream hex GeoJSON
+# =======================================================
+def write_hex_geojson(gdf_hex, path):
+    # Every feature has the same flat schema, so serialize each one with
+    # orjson and stream it to disk instead of going through GDAL.
+    props = gdf_hex.drop(columns="geometry")
+    props["h3"] = [h3.int_to_str(c) for c in props["h3"].tolist()]
+    records = props.to_dict("records")
+
+    # All ring vertices in one array, split per polygon by vertex count
+    geoms = gdf_hex.geometry.values
+    coords = shapely.get_coordinates(geoms)
+    counts = shapely.get_num_coordinates(geoms)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    with open(path, "wb") as f:
+        f.write(
+            b'{"type":"FeatureCollection","name":' + orjson.dumps(path.stem)
+            + b',"crs":{"type":"name","properties":{"name":"urn:ogc:def:crs:OGC:1.3:CRS84"}}'
+            + b',"features":[\n'
+        )
+        for i, (rec, start, end) in enumerate(zip(records, starts, ends)):
+            if i:
+                f.write(b",\n")
+            f.write(orjson.dumps({
+                "type": "Feature",
+                "properties": rec,
+                "geometry": {"type": "Polygon", "coordinates": [coords[start:end].tolist()]},
+            }))
+        f.write(b"\n]}\n")
+
 # =======================================================
 # Save outputs
 # =======================================================
@@ -86,24 +247,34 @@ def save_outputs(df_incidents, gdf_hex):
     from pathlib import Path
     output_dir = Path(__file__).parent
 
-    # Incident-level CSV with H3 mapping
-    df_incidents.to_csv(
-        output_dir / "incidents_with_h3.csv",
+    # Incident-level + aggregated H3 hex-level Parquet (GeoParquet for the hexes)
+    df_incidents.to_parquet(
+        output_dir / "incidents_with_h3.parquet",
+        engine="pyarrow",
+        compression="zstd",
         index=False
     )
-
-    # Aggregated H3 hex-level CSV + GeoJSON
-    gdf_hex.to_csv(
-        output_dir / "h3_hex_summary.csv",
+    gdf_hex.to_parquet(
+        output_dir / "h3_hex_summary.parquet",
+        compression="zstd",
         index=False
     )
 
-    gdf_hex.to_file(
-        output_dir / "h3_hex_summary.geojson",
-        driver="GeoJSON"
+    # CSV copies for existing consumers, serialized by Arrow's
+    # multithreaded C++ writer instead of pandas' Python-level one
+    pa_csv.write_csv(
+        pa.Table.from_pandas(df_incidents, preserve_index=False),
+        output_dir / "incidents_with_h3.csv"
+    )
+    pa_csv.write_csv(
+        pa.Table.from_pandas(gdf_hex.to_wkt(rounding_precision=-1), preserve_index=False),
+        output_dir / "h3_hex_summary.csv"
     )
 
-    print("[OK] Saved incident-level CSV, aggregated CSV, and GeoJSON.")
+    # GeoJSON is read by the map and frontend, which key on H3 strings
+    write_hex_geojson(gdf_hex, output_dir / "h3_hex_summary.geojson")
+
+    print("[OK] Saved incident-level and aggregated Parquet/CSV, and GeoJSON.")
 
 # =======================================================
 # MAIN
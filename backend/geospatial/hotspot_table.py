@@ -3,25 +3,77 @@ Generate H3 hotspot table with city names and rankings.
 """
 
 import pandas as pd
+import numpy as np
 import json
 from pathlib import Path
+import h3.api.numpy_int as h3
 
-BASE_DIR = Path(r"C:\Users\SAHARA\OneDrive\Desktop\uni\gemma")
+# Outputs written by geospatial_engine.save_outputs
+GEO_DIR = Path(__file__).parent
 
-def generate_hotspot_table(top_n=10):
+def read_h3_csv(path, **kwargs):
+    """
+    Read a geospatial CSV with its "h3" column as uint64 cell ids.
+    Outputs written before the switch to integer cells store hex strings.
+    """
+    df = pd.read_csv(path, **kwargs)
+    if not pd.api.types.is_integer_dtype(df["h3"]):
+        df["h3"] = np.array([h3.str_to_int(c) for c in df["h3"].tolist()], dtype=np.uint64)
+    return df.astype({"h3": "uint64"})
+
+def majority_city_by_h3(incidents_df):
+    """
+    Most frequent Incident_City per H3 cell, as an ["h3", "city"] frame.
+    Cells that straddle a city boundary get their majority city.
+    """
+    h3_codes, cells = pd.factorize(incidents_df["h3"], sort=False)
+    city_codes, cities = pd.factorize(incidents_df["Incident_City"], sort=False)
+    
+    # (cell, city) counts from one bincount over the combined codes
+    known = city_codes >= 0
+    counts = np.bincount(
+        h3_codes[known] * len(cities) + city_codes[known],
+        minlength=len(cells) * len(cities)
+    ).reshape(len(cells), len(cities))
+    
+    city = np.full(len(cells), None, dtype=object)
+    if len(cities):
+        seen = counts.sum(axis=1) > 0
+        city[seen] = np.asarray(cities, dtype=object)[counts[seen].argmax(axis=1)]
+    return pd.DataFrame({"h3": np.asarray(cells), "city": city})
+
+def load_geo_output(name, columns):
+    """
+    Load one of geospatial_engine's outputs, preferring the Parquet copy and
+    falling back to CSV.
+    """
+    parquet_path = GEO_DIR / f"{name}.parquet"
+    if parquet_path.exists():
+        df = pd.read_parquet(parquet_path, columns=columns)
+        return df.astype({"h3": "uint64"})
+    return read_h3_csv(
+        GEO_DIR / f"{name}.csv",
+        usecols=columns,
+        dtype={"Incident_City": "category"},
+        engine="pyarrow"
+    )
+
+def generate_hotspot_table(incidents_df=None, h3_df=None, top_n=10):
     """
     Generate a hotspot table ranked by incident count.
+    In-process callers can pass the engine's DataFrames directly; otherwise
+    they are loaded from the saved outputs.
     """
     # Load incidents with H3 mapping
-    incidents_path = BASE_DIR / "geospatial" / "incidents_with_h3.csv"
-    incidents_df = pd.read_csv(incidents_path)
+    if incidents_df is None:
+        incidents_df = load_geo_output("incidents_with_h3", ["h3", "Incident_City"])
     
     # Load H3 aggregates
-    h3_path = BASE_DIR / "geospatial" / "h3_hex_summary.csv"
-    h3_df = pd.read_csv(h3_path)
+    if h3_df is None:
+        h3_df = load_geo_output("h3_hex_summary", ["h3", "incidents", "avg_on_scene"])
     
-    # Merge to get city names for each H3 cell
-    incidents_h3_city = incidents_df[["h3", "Incident_City"]].drop_duplicates(subset=["h3"]).rename(columns={"Incident_City": "city"})
+    # Majority city for each H3 cell
+    incidents_h3_city = majority_city_by_h3(incidents_df)
     
     # Join with H3 aggregates
     merged = h3_df[["h3", "incidents", "avg_on_scene"]].merge(
@@ -33,6 +85,7 @@ def generate_hotspot_table(top_n=10):
     # Sort by incidents (descending) and get top N
     hotspots = merged.sort_values("incidents", ascending=False).head(top_n).reset_index(drop=True)
     hotspots["rank"] = range(1, len(hotspots) + 1)
+    hotspots["h3"] = [h3.int_to_str(c) for c in hotspots["h3"].tolist()]
     
     # Rename columns for clarity
     hotspots = hotspots[["rank", "h3", "city", "incidents", "avg_on_scene"]].rename(columns={
@@ -49,7 +102,7 @@ def generate_hotspot_table(top_n=10):
 
 def save_hotspot_table(hotspots, format="json"):
     """Save hotspot table in JSON or CSV format."""
-    output_dir = BASE_DIR / "geospatial" / "outputs"
+    output_dir = GEO_DIR / "outputs"
     output_dir.mkdir(exist_ok=True)
     
     if format == "json":
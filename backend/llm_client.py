@@ -1,10 +1,84 @@
 # llm_client.py
+import asyncio
+import os
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 import re
 import time
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 
 
+# -------------------------------------------------------------------
+# Mode detection keywords + system prompts
+# -------------------------------------------------------------------
+DATA_KEYWORDS = [
+    "dataset", "csv", "table", "incident count", "top city",
+    "cluster", "kmeans", "model", "heatmap", "classification",
+    "risk dashboard", "predict", "feature"
+]
+EMS_KEYWORDS = [
+    "ems", "protocol", "patient", "breathing", "difficulty",
+    "incident", "collapse", "risk", "seizure", "unresponsive",
+    "chest pain"
+]
+
+# One alternation per mode, so a message is scanned once per mode instead
+# of once per keyword. Plain substring matches (no \b), same as `k in msg`.
+DATA_RE = re.compile("|".join(map(re.escape, DATA_KEYWORDS)), re.IGNORECASE)
+EMS_RE = re.compile("|".join(map(re.escape, EMS_KEYWORDS)), re.IGNORECASE)
+
+DATA_PROMPT = (
+    "You are a data analysis assistant. "
+    "Answer ONLY about data, statistics, ML, clusters, predictions, "
+    "and quantitative insights. "
+    "If the user asks about EMS symptoms, ignore — stay in data mode."
+)
+
+EMS_PROMPT = (
+    "You are an EMS *operational* assistant. "
+    "You DO NOT give medical treatment advice. "
+    "You ONLY provide: \n"
+    "- operational severity classification (LOW/MEDIUM/HIGH),\n"
+    "- scene observations,\n"
+    "- dispatch/transport priorities,\n"
+    "- recommended EMS workflow steps.\n\n"
+    "If the user does NOT provide patient details, "
+    "still answer normally using general EMS operational knowledge. "
+    "NEVER say 'No EMS data provided'. Just answer."
+)
+
+CHAT_PROMPT = (
+    "You are a fast friendly conversational assistant. "
+    "Keep responses short. Do NOT assume EMS or data mode unless asked."
+)
+
+_PROMPTS = {"data": DATA_PROMPT, "ems": EMS_PROMPT, "chat": CHAT_PROMPT}
+
+# Returned by ask() when the model can't be reached
+UNREACHABLE_ANSWER = "I'm having trouble reaching the model right now."
+
+
+@lru_cache(maxsize=2048)
+def _detect_mode(msg: str) -> str:
+    """Return 'data', 'ems' or 'chat' for a (lowercased) user message."""
+    # ----- MODE 1 — Data analysis -----
+    if DATA_RE.search(msg):
+        return "data"
+
+    # ----- MODE 2 — EMS operational assistant (SAFE) -----
+    if EMS_RE.search(msg):
+        return "ems"
+
+    # ----- MODE 3 — General chat -----
+    return "chat"
+
+
+# ```python fenced block in model output (generic ``` fences use str.find)
+_PY_BLOCK_RE = re.compile(r"```python(.*?)```", re.DOTALL | re.IGNORECASE)
+
+
 class LLMClient:
     """
     Gemma 7B client (rewritten for speed + correct mode switching)
@@ -26,6 +100,7 @@ class LLMClient:
         timeout: int = 60,
         max_retries: int = 3,
         sleep_between_calls: float = 0.05,
+        keep_alive: str = "30m",
     ):
         self.model = model
         self.base_url = base_url
@@ -33,7 +108,26 @@ class LLMClient:
         self.timeout = timeout
         self.max_retries = max_retries
         self.sleep_between_calls = sleep_between_calls
+        # Keeps the model (and its cached KV prefix) loaded between calls
+        self.keep_alive = keep_alive
         self.session = requests.Session()
+        # Keep a pool of keep-alive connections large enough for concurrent
+        # ask() calls; retries are handled by _post_with_retry.
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Async path for the API: awaits the model without holding a worker
+        # thread per in-flight call. Same 32-connection keep-alive pool.
+        self._aclient = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+        )
+        # Ollama batches up to OLLAMA_NUM_PARALLEL concurrent requests per
+        # model into one forward pass and queues the rest server-side, where
+        # the wait counts against `timeout` and ends in retries that redo the
+        # work. Admit only that many at once and let the rest wait here.
+        self.num_parallel = max(int(os.getenv("OLLAMA_NUM_PARALLEL", "4")), 1)
+        self._slots = asyncio.Semaphore(self.num_parallel)
 
     # -------------------------------------------------------------------
     # Internal post with retry
@@ -55,65 +149,49 @@ class LLMClient:
                 delay *= 1.4
         return None
 
+    async def _apost_with_retry(self, payload: Dict) -> Optional[Dict]:
+        delay = 0.5
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                resp = await self._aclient.post(self.chat_url, json=payload)
+                resp.raise_for_status()
+                return resp.json()
+            except Exception as e:
+                print(f"[LLMClient] Error {attempt}: {e}")
+                if attempt == self.max_retries:
+                    return None
+                await asyncio.sleep(delay)
+                delay *= 1.4
+        return None
+
+    async def aclose(self) -> None:
+        await self._aclient.aclose()
+
     # -------------------------------------------------------------------
     # MODE DETECTION (Dual-mode C)
     # -------------------------------------------------------------------
     def _build_system_prompt(self, user_message: str) -> str:
-        msg = user_message.lower()
-
-        # ----- MODE 1 — Data analysis -----
-        data_keywords = [
-            "dataset", "csv", "table", "incident count", "top city",
-            "cluster", "kmeans", "model", "heatmap", "classification",
-            "risk dashboard", "predict", "feature"
-        ]
-        if any(k in msg for k in data_keywords):
-            return (
-                "You are a data analysis assistant. "
-                "Answer ONLY about data, statistics, ML, clusters, predictions, "
-                "and quantitative insights. "
-                "If the user asks about EMS symptoms, ignore — stay in data mode."
-            )
-
-        # ----- MODE 2 — EMS operational assistant (SAFE) -----
-        ems_keywords = [
-            "ems", "protocol", "patient", "breathing", "difficulty",
-            "incident", "collapse", "risk", "seizure", "unresponsive",
-            "chest pain"
-        ]
-        if any(k in msg for k in ems_keywords):
-            return (
-                "You are an EMS *operational* assistant. "
-                "You DO NOT give medical treatment advice. "
-                "You ONLY provide: \n"
-                "- operational severity classification (LOW/MEDIUM/HIGH),\n"
-                "- scene observations,\n"
-                "- dispatch/transport priorities,\n"
-                "- recommended EMS workflow steps.\n\n"
-                "If the user does NOT provide patient details, "
-                "still answer normally using general EMS operational knowledge. "
-                "NEVER say 'No EMS data provided'. Just answer."
-            )
-
-        # ----- MODE 3 — General chat -----
-        return (
-            "You are a fast friendly conversational assistant. "
-            "Keep responses short. Do NOT assume EMS or data mode unless asked."
-        )
+        # Repeated prompts (dashboards, retries) hit the module-level cache
+        return _PROMPTS[_detect_mode(user_message.lower())]
 
     # -------------------------------------------------------------------
     # Public ask()
     # -------------------------------------------------------------------
-    def ask(self, prompt: str) -> str:
-        system_prompt = self._build_system_prompt(prompt)
+    def _ask_payload(self, prompt: str, instructions: Optional[str]) -> Dict:
+        if instructions:
+            system_prompt = self._build_system_prompt(f"{instructions}\n{prompt}")
+            system_prompt = f"{system_prompt}\n\n{instructions}"
+        else:
+            system_prompt = self._build_system_prompt(prompt)
 
-        payload = {
+        return {
             "model": self.model,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
             ],
             "stream": False,
+            "keep_alive": self.keep_alive,
             "options": {
                 "temperature": 0.2,
                 "top_p": 0.85,
@@ -122,9 +200,10 @@ class LLMClient:
             }
         }
 
-        data = self._post_with_retry(payload)
+    @staticmethod
+    def _answer_text(data: Optional[Dict]) -> str:
         if not data:
-            return "I'm having trouble reaching the model right now."
+            return UNREACHABLE_ANSWER
 
         # Ollama formats vary
         if "message" in data:
@@ -139,6 +218,21 @@ class LLMClient:
 
         return str(data)
 
+    def ask(self, prompt: str, instructions: Optional[str] = None) -> str:
+        """
+        Ask the model. `instructions` is invariant text (role, rules, static
+        data) sent in the system message ahead of the per-request `prompt`,
+        so Ollama can reuse the KV cache of that shared prefix across calls.
+        """
+        return self._answer_text(self._post_with_retry(self._ask_payload(prompt, instructions)))
+
+    async def aask(self, prompt: str, instructions: Optional[str] = None) -> str:
+        """Async ask(), for callers running on an event loop."""
+        payload = self._ask_payload(prompt, instructions)
+        async with self._slots:
+            data = await self._apost_with_retry(payload)
+        return self._answer_text(data)
+
     # -------------------------------------------------------------------
     # Code extractor
     # -------------------------------------------------------------------
@@ -169,12 +263,14 @@ class LLMClient:
     def _extract_python_code(self, text: str) -> str:
         if not isinstance(text, str):
             return ""
-        m = re.search(r"```python(.*?)```", text, re.DOTALL | re.IGNORECASE)
-        if m:
-            return m.group(1).strip()
-        m = re.search(r"```(.*?)```", text, re.DOTALL)
+        m = _PY_BLOCK_RE.search(text)
         if m:
             return m.group(1).strip()
+        start = text.find("```")
+        if start != -1:
+            end = text.find("```", start + 3)
+            if end != -1:
+                return text[start + 3:end].strip()
         return text.strip()
 
     # -------------------------------------------------------------------
@@ -10,27 +10,90 @@
 # - Existing dashboard endpoints untouched
 # ================================
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from pathlib import Path
+import numpy as np
 import pandas as pd
-import json
+import asyncio
+import gzip
+import hashlib
+import orjson
+import re
 import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 
-from llm_client import LLMClient
+try:
+    from rapidfuzz import process, fuzz
+    _HAS_RAPIDFUZZ = True
+except Exception:
+    _HAS_RAPIDFUZZ = False
+
+try:
+    import numba
+    _HAS_NUMBA = True
+except Exception:
+    _HAS_NUMBA = False
+
+try:
+    import ahocorasick
+    _HAS_AHOCORASICK = True
+except Exception:
+    _HAS_AHOCORASICK = False
+
+try:
+    import brotli
+    _HAS_BROTLI = True
+except Exception:
+    _HAS_BROTLI = False
+
+from llm_client import LLMClient, UNREACHABLE_ANSWER
+from semantic_cache import SemanticCache, load_default_embedder
+from geospatial.hotspot_table import load_geo_output, majority_city_by_h3
+from eda.csv_to_parquet import CATEGORY_COLUMNS, load_eda_table
 
 # ---------------- App & CORS ----------------
-app = FastAPI()
+def json_default(obj):
+    # Nullable columns (e.g. the Int8 "hour") yield pd.NA for missing values
+    if obj is pd.NA:
+        return None
+    raise TypeError
+
+class ORJSONResponse(JSONResponse):
+    # orjson instead of the stdlib encoder; numpy scalars/arrays and NaN
+    # (as null) serialize in C. Local class: fastapi's own is deprecated.
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Read and pre-compress the dashboard JSON on worker threads in parallel
+    # before serving; anything missed is still loaded on first request
+    await asyncio.gather(*(
+        asyncio.to_thread(load_static_file, path) for path in static_json_paths()
+    ))
+    yield
+    await llm_client.aclose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # or replace '*' with your frontend URL if you want to restrict
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Compresses dynamic responses (dataset pages, hotspot tables, chat); the
+# static dashboard JSON below is served pre-compressed and passes through.
+# Level 5 rather than Starlette's default 9: on the 59 MB clustered_data.csv
+# (when it has no .gz beside it) it's ~1s of CPU instead of ~3s for the
+# same ~10 MB output.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # ---------------- Config ----------------
 # Use relative paths from backend folder
@@ -45,32 +108,112 @@ GEO_PATH = BASE_DIR / "geospatial" / "h3_hex_summary.geojson"
 # ---------------- LLM ----------------
 llm_client = LLMClient(sleep_between_calls=0.01)
 
+# Repeat / paraphrased questions are answered from here instead of the LLM
+answer_cache = SemanticCache(embed=load_default_embedder())
+
+# Identical prompts already being generated: flight key -> [task, waiters].
+# The generation runs as its own task that every caller (the first one
+# included) awaits, so one client disconnecting doesn't cancel the answer
+# for the others; it's only cancelled once nobody is waiting. Only touched
+# from the event loop thread, so no lock is needed.
+INFLIGHT: Dict[bytes, list] = {}
+
+async def generate_answer(mode: str, message: Optional[str], key: str, prompt: str, instructions: str) -> str:
+    answer = await llm_client.aask(prompt, instructions)
+    if answer and answer != UNREACHABLE_ANSWER:
+        await run_in_threadpool(answer_cache.put, mode, message, key, answer)
+    return answer
+
+def end_flight(flight_key: bytes, entry: list) -> None:
+    if INFLIGHT.get(flight_key) is entry:
+        del INFLIGHT[flight_key]
+
+async def ask_llm(mode: str, msg: str, prompt: str, instructions: str) -> str:
+    # EMS answers depend on details (age, symptoms) that a near-duplicate
+    # message can differ in, so they only reuse exact prompt matches
+    message = None if mode == "ems" else msg
+    key = f"{instructions}\n{prompt}"
+    cached = await run_in_threadpool(answer_cache.get, mode, message, key)
+    if cached is not None:
+        return cached
+
+    flight_key = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    entry = INFLIGHT.get(flight_key)
+    if entry is None:
+        task = asyncio.create_task(generate_answer(mode, message, key, prompt, instructions))
+        entry = INFLIGHT[flight_key] = [task, 0]
+
+        def on_done(t: asyncio.Task, entry=entry) -> None:
+            end_flight(flight_key, entry)
+            # Mark retrieved so a failure nobody waited on isn't logged
+            if not t.cancelled():
+                t.exception()
+
+        task.add_done_callback(on_done)
+
+    task = entry[0]
+    entry[1] += 1
+    try:
+        # shield: a cancelled caller must not cancel the shared task
+        return await asyncio.shield(task)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and not task.done():
+            # Every caller is gone: stop generating, and make sure a new
+            # caller starts a fresh task instead of joining this one
+            end_flight(flight_key, entry)
+            task.cancel()
+
 # ---------------- Load Dataset ----------------
 if not CSV_PATH.exists():
     raise FileNotFoundError(f"CSV not found at: {CSV_PATH}")
 
-df = pd.read_csv(CSV_PATH)
+def read_json(path: Path):
+    return orjson.loads(path.read_bytes())
+
+# eda.parquet (see eda/csv_to_parquet.py) when it's current, else eda.csv via
+# Arrow's CSV reader. Low-cardinality text columns arrive as dictionary
+# arrays, i.e. Categoricals: int codes instead of one PyObject string per row.
+df = load_eda_table().to_pandas()
 
 # ---- Load operational efficiency & risk data ----
-risk_by_hour = []
-peak_risk_hours = {}
-try:
-    risk_by_hour_path = OP_OUTPUT_DIR / "risk_by_hour.json"
-    if risk_by_hour_path.exists():
-        with open(risk_by_hour_path) as f:
-            risk_by_hour = json.load(f)
+# Only the operational chat path needs these, so they're read on first use
+@lru_cache(maxsize=1)
+def load_risk_by_hour() -> list:
+    risk_by_hour = []
+    try:
+        risk_by_hour_path = OP_OUTPUT_DIR / "risk_by_hour.json"
+        if risk_by_hour_path.exists():
+            risk_by_hour = read_json(risk_by_hour_path)
             print(f"Loaded {len(risk_by_hour)} hours of risk data")
-except Exception as e:
-    print(f"Warning: Could not load risk_by_hour.json: {e}")
+    except Exception as e:
+        print(f"Warning: Could not load risk_by_hour.json: {e}")
+    return risk_by_hour
 
-try:
-    peak_risk_path = OP_OUTPUT_DIR / "peak_risk_hours.json"
-    if peak_risk_path.exists():
-        with open(peak_risk_path) as f:
-            peak_risk_hours = json.load(f)
+@lru_cache(maxsize=1)
+def load_peak_risk_hours() -> dict:
+    peak_risk_hours = {}
+    try:
+        peak_risk_path = OP_OUTPUT_DIR / "peak_risk_hours.json"
+        if peak_risk_path.exists():
+            peak_risk_hours = read_json(peak_risk_path)
             print(f"Loaded peak risk hours: {peak_risk_hours.get('worst_hour_for_high_risk', 'N/A')}")
-except Exception as e:
-    print(f"Warning: Could not load peak_risk_hours.json: {e}")
+    except Exception as e:
+        print(f"Warning: Could not load peak_risk_hours.json: {e}")
+    return peak_risk_hours
+
+@lru_cache(maxsize=1)
+def peak_delay_hour() -> Optional[tuple]:
+    # (hour, delayed_pct) of the hour with the highest delayed share, found
+    # with argmax (first maximum wins, like max()); None when there's no data
+    risk_by_hour = load_risk_by_hour()
+    if not isinstance(risk_by_hour, list):
+        return None
+    hour_rows = [(h.get('hour'), h.get('delayed_pct', 0)) for h in risk_by_hour if isinstance(h, dict)]
+    if not hour_rows:
+        return None
+    delay_pct = np.array([pct for _, pct in hour_rows], dtype=np.float64)
+    return hour_rows[int(delay_pct.argmax())]
 
 # ---- Load protocol names from RAG store ----
 AVAILABLE_PROTOCOLS: Dict[str, str] = {}
@@ -86,11 +229,33 @@ try:
 except Exception as e:
     print(f"Warning: Could not load protocols from RAG store: {e}")
 
+# Arrow builds dictionaries in arrival order: sort the categories so
+# groupby/value_counts see the same key order as the old object columns.
+# "" must be a category before it can fill a Categorical's missing values.
+for c in CATEGORY_COLUMNS:
+    if c in df.columns:
+        df[c] = df[c].cat.set_categories(sorted({"", *df[c].cat.categories}))
 df.fillna("", inplace=True)
 
-# Extract hour from time column for analysis
+# Extract hour from time column for analysis. Timestamps are always
+# "YYYY-MM-DD HH:MM:SS", so slice the hour digits instead of running the
+# datetime parser over the whole column; unparseable values become <NA>.
 if "Time_Call_Was_Received" in df.columns:
-    df["hour"] = pd.to_datetime(df["Time_Call_Was_Received"], errors="coerce").dt.hour
+    call_hour = df["Time_Call_Was_Received"].astype("string").str.slice(11, 13)
+    df["hour"] = pd.to_numeric(call_hour, errors="coerce").astype("Int8")
+
+# /dataset pages serve every column, so none can be dropped; instead the
+# remaining text columns that mostly repeat (county, gender, disposition,
+# protocol, ...) become Categoricals too. Rows serialize to the same values.
+for c in df.columns[df.dtypes == object]:
+    if df[c].nunique() <= len(df) // 2:
+        df[c] = df[c].astype("category")
+
+# Integer columns are downcast to the smallest type that holds them (age
+# 0-165 -> uint8, year -> uint16); they still serialize as the same ints.
+# Float columns stay float64: float32 would change the values /dataset emits.
+for c in df.columns[df.dtypes == np.int64]:
+    df[c] = pd.to_numeric(df[c], downcast="unsigned" if df[c].min() >= 0 else "integer")
 
 COL_CITY = "Incident_City"
 COL_AGE = "Patient_Age"
@@ -99,117 +264,308 @@ COL_IMPRESSION = "Primary_Impression"
 # ---------------- COMPUTE LAYER (SOURCE OF TRUTH) ----------------
 # Anything numeric is computed ONCE here
 
-CITY_COUNTS = (
-    df[df[COL_CITY] != ""]
-    .groupby(COL_CITY)
-    .size()
-    .sort_values(ascending=False)
-)
+def category_counts(col: pd.Series) -> pd.Series:
+    """Rows per category of a Categorical column: one bincount over its codes."""
+    codes = col.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(col.cat.categories))
+    return pd.Series(counts, index=col.cat.categories.astype(object))
+
+# Same ordering as groupby(observed=True).size() over the sorted categories,
+# minus the "" fill value and empty categories
+_city_counts = category_counts(df[COL_CITY])
+CITY_COUNTS = _city_counts[(_city_counts > 0) & (_city_counts.index != "")].sort_values(ascending=False)
+# (city, incidents) for the "most/least city" questions
+CITY_MOST = (CITY_COUNTS.index[0], int(CITY_COUNTS.iloc[0])) if len(CITY_COUNTS) else None
+CITY_LEAST = (CITY_COUNTS.index[-1], int(CITY_COUNTS.iloc[-1])) if len(CITY_COUNTS) else None
 
 TOTAL_INCIDENTS = int(len(df))
 AVERAGE_AGE = float(df[COL_AGE].mean()) if COL_AGE in df.columns else None
-TOP_IMPRESSIONS = (
-    df[COL_IMPRESSION]
-    .value_counts()
-    .head(5)
-    .to_dict()
+# Impression counts, sorted once; "top N" and "how many" queries are
+# answered from these instead of rescanning df per request
+# (built from first-appearance order so ties rank as value_counts did on
+# the object column)
+IMPRESSION_ORDER = df[COL_IMPRESSION].unique()
+IMPRESSION_COUNTS = (
+    category_counts(df[COL_IMPRESSION])
+    .reindex(IMPRESSION_ORDER.astype(object))
+    .sort_values(ascending=False)
 )
+IMPRESSION_ITEMS = [(c, int(n)) for c, n in IMPRESSION_COUNTS.items() if isinstance(c, str)]
+TOP_IMPRESSIONS = IMPRESSION_COUNTS.head(5).to_dict()
+
+# Averages and the busiest hour for the compute branch
+AVERAGE_MINUTES = {
+    c: float(df[c].mean())
+    for c in ("turnout_time_min", "response_time_min", "call_cycle_time_min", "on_scene_time_min")
+    if c in df.columns
+}
+# (hour, incidents) of the busiest call hour
+PEAK_CALL_HOUR = None
+if "hour" in df.columns and df["hour"].notna().any():
+    hour_counts = df["hour"].value_counts()
+    PEAK_CALL_HOUR = (int(hour_counts.idxmax()), int(hour_counts.max()))
+
+# Distinct impressions for the fuzzy "how many <condition>" match
+CONDITIONS = [c for c in IMPRESSION_ORDER if c]
+CONDITIONS_LOWER = [c.lower() for c in CONDITIONS]
+
+# Minimum similarity for a fuzzy condition match
+FUZZY_MIN_SCORE = 0.4
+
+def utf8_bytes(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+
+if not _HAS_RAPIDFUZZ and _HAS_NUMBA:
+    @numba.njit(cache=True)
+    def _lcs_length(query, cand):
+        # Bit-parallel LCS (Hyyro's variant of Myers' algorithm): one 64-bit
+        # word holds a DP column for queries up to 64 bytes
+        m = query.size
+        if m == 0 or cand.size == 0:
+            return 0
+        if m <= 64:
+            match = np.zeros(256, dtype=np.uint64)
+            for i in range(m):
+                match[query[i]] |= np.uint64(1) << np.uint64(i)
+            s = ~np.uint64(0)
+            for j in range(cand.size):
+                u = s & match[cand[j]]
+                s = (s + u) | (s - u)
+            lcs = 0
+            for i in range(m):
+                if not (s >> np.uint64(i)) & np.uint64(1):
+                    lcs += 1
+            return lcs
+        # Longer queries: plain two-row DP
+        prev = np.zeros(cand.size + 1, dtype=np.int64)
+        cur = np.zeros(cand.size + 1, dtype=np.int64)
+        for i in range(m):
+            for j in range(cand.size):
+                if query[i] == cand[j]:
+                    cur[j + 1] = prev[j] + 1
+                else:
+                    cur[j + 1] = max(prev[j + 1], cur[j])
+            prev, cur = cur, prev
+        return prev[cand.size]
+
+    @numba.njit(cache=True, parallel=True)
+    def _best_indel_match(query, flat, offsets):
+        # Indel ratio 2*LCS/(len_a + len_b), the measure fuzz.ratio and
+        # SequenceMatcher.ratio approximate
+        n = offsets.size - 1
+        scores = np.zeros(n)
+        for i in numba.prange(n):
+            cand = flat[offsets[i]:offsets[i + 1]]
+            total = query.size + cand.size
+            if total:
+                scores[i] = 2.0 * _lcs_length(query, cand) / total
+        best = scores.argmax()
+        return best, scores[best]
+
+    # All candidates' UTF-8 bytes in one flat array, split by offsets
+    _cond_bytes = [utf8_bytes(c) for c in CONDITIONS_LOWER]
+    CONDITION_BYTES = np.concatenate(_cond_bytes) if _cond_bytes else np.zeros(0, dtype=np.uint8)
+    CONDITION_OFFSETS = np.zeros(len(_cond_bytes) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in _cond_bytes], out=CONDITION_OFFSETS[1:])
+
+def match_condition(search_term: str) -> Optional[str]:
+    """Closest distinct impression to search_term, or None below FUZZY_MIN_SCORE."""
+    if not CONDITIONS:
+        return None
+    term = search_term.lower()
+
+    if _HAS_RAPIDFUZZ:
+        # C++ Indel ratio, same 2*matches/length measure as SequenceMatcher.ratio
+        hit = process.extractOne(term, CONDITIONS_LOWER, scorer=fuzz.ratio, score_cutoff=FUZZY_MIN_SCORE * 100)
+        return CONDITIONS[hit[2]] if hit else None
+
+    if _HAS_NUMBA:
+        # Compiled bit-parallel Indel ratio over every condition
+        idx, score = _best_indel_match(utf8_bytes(term), CONDITION_BYTES, CONDITION_OFFSETS)
+        return CONDITIONS[idx] if score >= FUZZY_MIN_SCORE else None
+
+    from difflib import SequenceMatcher
+    best_match = None
+    best_score = FUZZY_MIN_SCORE
+    for cond, cond_lower in zip(CONDITIONS, CONDITIONS_LOWER):
+        score = SequenceMatcher(None, term, cond_lower).ratio()
+        if score > best_score:
+            best_score = score
+            best_match = cond
+    return best_match
 
 # ---------------- RAG STORE (Protocols Only) ----------------
-RAG_CACHE: List[str] = []
-if RAG_STORE_PATH.exists():
-    for f in RAG_STORE_PATH.glob("*.json"):
-        try:
-            with open(f, "r", encoding="utf-8") as fh:
-                data = json.load(fh)
-                RAG_CACHE.append(json.dumps(data))
-        except Exception:
-            pass
+@lru_cache(maxsize=1)
+def rag_cache() -> List[bytes]:
+    """Compact JSON bytes of each store file, read on first use."""
+    cache: List[bytes] = []
+    if RAG_STORE_PATH.exists():
+        for path in RAG_STORE_PATH.glob("*.json"):
+            try:
+                cache.append(orjson.dumps(read_json(path)))
+            except Exception:
+                pass
+    return cache
 
 # ---------------- Protocol Retrieval ----------------
 
+# Keywords to protocol matching: category -> related protocol terms
+PROTOCOL_KEYWORD_MAP = {
+    "allergic": ["allergic reaction", "anaphylaxis"],
+    "cardiac arrest": ["cardiac arrest"],
+    "chest pain": ["chest pain", "acute coronary syndrome", "stemi"],
+    "asthma": ["bronchospasm", "asthma", "copd"],
+    "respiratory": ["respiratory", "respiratory distress", "shortness of breath", "airway", "breathing", "breathe"],
+    "seizure": ["seizure"],
+    "stroke": ["stroke", "tia", "cva"],
+    "trauma": ["traumatic", "trauma"],
+    "shock": ["shock"],
+    "drowning": ["drowning", "submersion"],
+    "burns": ["burns"],
+    "pediatric": ["pediatric", "pedi"],
+    "newborn": ["newborn", "resuscitation"],
+    "obstetric": ["obstetrical", "delivery", "obstetric"],
+    "sepsis": ["sepsis"],
+    "pain management": ["pain management"],
+    "tachycardia": ["tachycardia"],
+    "bradycardia": ["bradycardia"],
+    "nausea": ["nausea", "vomiting"],
+    "syncope": ["syncope", "fainting"],
+    "abortion": ["abortion", "miscarriage"],
+}
+
+# Category -> AVAILABLE_PROTOCOLS whose name contains a related term,
+# built once instead of rescanning every protocol per query
+PROTOCOL_INDEX: Dict[str, List[str]] = {
+    keyword: [
+        protocol_name
+        for protocol_lower, protocol_name in AVAILABLE_PROTOCOLS.items()
+        if any(term in protocol_lower for term in related_terms)
+    ]
+    for keyword, related_terms in PROTOCOL_KEYWORD_MAP.items()
+}
+
+# Every query trigger (category keyword or related term) -> its category.
+# Overlapping lookahead matches report every trigger in one pass; longest
+# first, which is safe because no trigger is a prefix of another
+# category's trigger.
+PROTOCOL_TRIGGERS = {
+    term: keyword
+    for keyword, related_terms in PROTOCOL_KEYWORD_MAP.items()
+    for term in [keyword, *related_terms]
+}
+PROTOCOL_TRIGGER_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(PROTOCOL_TRIGGERS, key=len, reverse=True))) + "))"
+)
+
 def retrieve_relevant_protocols(query: str, top_k: int = 3) -> List[str]:
     """
     Retrieve relevant protocols from RAG store based on user query.
     Returns list of actual protocol names that exist in RAG store.
     """
     q = query.lower()
-    matching_protocols = []
+    hits = {PROTOCOL_TRIGGERS[m.group(1)] for m in PROTOCOL_TRIGGER_RE.finditer(q)}
     
-    # Keywords to protocol matching
-    keyword_map = {
-        "allergic": ["allergic reaction", "anaphylaxis"],
-        "cardiac arrest": ["cardiac arrest"],
-        "chest pain": ["chest pain", "acute coronary syndrome", "stemi"],
-        "asthma": ["bronchospasm", "asthma", "copd"],
-        "respiratory": ["respiratory", "respiratory distress", "shortness of breath", "airway", "breathing", "breathe"],
-        "seizure": ["seizure"],
-        "stroke": ["stroke", "tia", "cva"],
-        "trauma": ["traumatic", "trauma"],
-        "shock": ["shock"],
-        "drowning": ["drowning", "submersion"],
-        "burns": ["burns"],
-        "pediatric": ["pediatric", "pedi"],
-        "newborn": ["newborn", "resuscitation"],
-        "obstetric": ["obstetrical", "delivery", "obstetric"],
-        "sepsis": ["sepsis"],
-        "pain management": ["pain management"],
-        "tachycardia": ["tachycardia"],
-        "bradycardia": ["bradycardia"],
-        "nausea": ["nausea", "vomiting"],
-        "syncope": ["syncope", "fainting"],
-        "abortion": ["abortion", "miscarriage"],
-    }
-    
-    # Search for matching protocols
-    for keyword, related_terms in keyword_map.items():
-        if keyword in q or any(term in q for term in related_terms):
-            for protocol_lower, protocol_name in AVAILABLE_PROTOCOLS.items():
-                # Check if protocol matches the keyword category
-                if any(term in protocol_lower for term in related_terms):
-                    if protocol_name not in matching_protocols:
-                        matching_protocols.append(protocol_name)
+    # Search for matching protocols, in keyword map order
+    matching_protocols = []
+    for keyword in PROTOCOL_KEYWORD_MAP:
+        if keyword in hits:
+            matching_protocols.extend(PROTOCOL_INDEX[keyword])
     
-    return matching_protocols[:top_k]
+    return list(dict.fromkeys(matching_protocols))[:top_k]
 
 # ---------------- Intent Detection ----------------
 
-def detect_intent(msg: str) -> str:
-    s = msg.lower()
-    if s in {"hi", "hello", "hey", "bye", "thanks"}:
-        return "greeting"
-    if any(k in s for k in ["delay", "delayed", "response time", "critical", "window", "peak", "when", "hour"]):
-        return "operational"
+GREETINGS = {"hi", "hello", "hey", "bye", "thanks"}
+
+# Checked in this order; first intent with any keyword (as a substring) wins
+INTENT_KEYWORDS = {
+    "operational": ["delay", "delayed", "response time", "critical", "window", "peak", "when", "hour"],
     # EMS intent for: protocols, symptoms, patient info, age-based scenarios
-    ems_keywords = [
+    "ems": [
         "protocol", "ems", "triage", "cardiac", "trauma", "patient", "symptom", 
         "age", "breathing", "breathe", "not breathing", "stop breathing", "allergic", 
         "chest pain", "seizure", "burn", "wound", "injury", "drowning", "shock",
         "collapse", "unresponsive", "unconscious", "coma", "stroke", "sepsis",
         "respiratory", "asthma", "copd", "pneumonia", "infarction"
-    ]
-    if any(k in s for k in ems_keywords):
-        return "ems"
-    if any(k in s for k in ["why", "explain", "trend"]):
-        return "reason"
-    if any(k in s for k in ["most", "least", "highest", "lowest", "count", "how many", "top", "average", "risk"]):
-        return "compute"
+    ],
+    "reason": ["why", "explain", "trend"],
+    "compute": ["most", "least", "highest", "lowest", "count", "how many", "top", "average", "risk"],
+}
+
+# One compiled alternation per intent: a single scan of the message per
+# intent instead of one `in` check per keyword. Intents stay separate
+# because keywords overlap across them ("age" inside "average").
+INTENT_PATTERNS = [
+    (intent, re.compile("|".join(map(re.escape, keywords))))
+    for intent, keywords in INTENT_KEYWORDS.items()
+]
+
+INTENT_ORDER = list(INTENT_KEYWORDS)
+
+if _HAS_AHOCORASICK:
+    # One automaton over every keyword: a single pass over the message
+    # reports all (overlapping) keyword hits, each tagged with the bitmask
+    # of intents it belongs to; the lowest set bit is the winning intent.
+    INTENT_AUTOMATON = ahocorasick.Automaton()
+    for bit, (intent, keywords) in enumerate(INTENT_KEYWORDS.items()):
+        for keyword in keywords:
+            mask = INTENT_AUTOMATON.get(keyword, 0) | (1 << bit)
+            INTENT_AUTOMATON.add_word(keyword, mask)
+    INTENT_AUTOMATON.make_automaton()
+
+def detect_intent(msg: str) -> str:
+    s = msg.lower()
+    if s in GREETINGS:
+        return "greeting"
+    if _HAS_AHOCORASICK:
+        hits = 0
+        for _, mask in INTENT_AUTOMATON.iter(s):
+            hits |= mask
+            if hits & 1:  # highest priority intent, nothing can beat it
+                break
+        if hits:
+            return INTENT_ORDER[(hits & -hits).bit_length() - 1]
+        return "chat"
+    for intent, pattern in INTENT_PATTERNS:
+        if pattern.search(s):
+            return intent
     return "chat"
 
 # ---------------- COMPUTE HANDLERS ----------------
 
+# "top 5 impressions" -> 5
+TOP_N_RE = re.compile(r"top\s+(\d+)")
+
+@lru_cache(maxsize=64)
+def top_impressions_text(limit: int) -> str:
+    # Formatted once per N; counts never change while the API runs
+    result = IMPRESSION_COUNTS.head(limit)
+    formatted = ", ".join([f"{cond} ({count:,})" for cond, count in result.items()])
+    return f"Top {limit} primary impressions: {formatted}"
+
+def count_impressions_matching(term: str) -> int:
+    """
+    Incidents whose impression matches term, with the same rules as
+    df[COL_IMPRESSION].str.contains(term, case=False): a case-insensitive
+    regex search (so "chest pain?" still matches), run over the distinct
+    impressions instead of every row. Invalid patterns match literally.
+    """
+    try:
+        pattern = re.compile(term, re.IGNORECASE)
+    except re.error:
+        pattern = re.compile(re.escape(term), re.IGNORECASE)
+    return sum(n for cond, n in IMPRESSION_ITEMS if pattern.search(cond))
+
 def handle_compute(msg: str) -> str:
     q = msg.lower()
 
     if "most" in q and "city" in q:
-        city = CITY_COUNTS.index[0]
-        count = int(CITY_COUNTS.iloc[0])
+        city, count = CITY_MOST
         return f"The city with the most incidents is {city}, with {count:,} incidents."
 
     if "least" in q and "city" in q:
-        non_zero = CITY_COUNTS[CITY_COUNTS > 0]
-        city = non_zero.index[-1]
-        count = int(non_zero.iloc[-1])
+        city, count = CITY_LEAST
         return f"The city with the least incidents is {city}, with {count:,} incidents."
 
     if "total" in q and "incident" in q:
@@ -218,63 +574,46 @@ def handle_compute(msg: str) -> str:
     # Averages - check most specific first
     if "average" in q:
         if "turnout" in q:
-            avg_turnout = df["turnout_time_min"].mean()
+            avg_turnout = AVERAGE_MINUTES["turnout_time_min"]
             return f"The average turnout time is approximately {avg_turnout:.2f} minutes."
         elif "response" in q:
-            avg_response = df["response_time_min"].mean()
+            avg_response = AVERAGE_MINUTES["response_time_min"]
             return f"The average response time is approximately {avg_response:.2f} minutes."
         elif "call" in q or "cycle" in q:
-            avg_cycle = df["call_cycle_time_min"].mean()
+            avg_cycle = AVERAGE_MINUTES["call_cycle_time_min"]
             return f"The average call cycle time is approximately {avg_cycle:.2f} minutes."
         elif "scene" in q or "on_scene" in q:
-            avg_scene = df["on_scene_time_min"].mean()
+            avg_scene = AVERAGE_MINUTES["on_scene_time_min"]
             return f"The average on-scene time is approximately {avg_scene:.2f} minutes."
         elif "age" in q:
             return f"The average patient age is approximately {AVERAGE_AGE:.1f} years."
 
     # "which hour had most incidents"
     if "hour" in q and "most" in q:
-        hour_counts = df["hour"].value_counts()
-        peak_hour = int(hour_counts.idxmax())
-        count = int(hour_counts.max())
+        peak_hour, count = PEAK_CALL_HOUR
         return f"Hour {peak_hour}:00 had the most incidents with {count:,} incidents."
 
     # Generic: "top X [impressions|diseases|conditions]"
     if "top" in q and ("impression" in q or "disease" in q or "condition" in q):
-        import re
-        match = re.search(r"top\s+(\d+)", q)
+        match = TOP_N_RE.search(q)
         limit = int(match.group(1)) if match else 10
-        result = df[COL_IMPRESSION].value_counts().head(limit)
-        formatted = ", ".join([f"{cond} ({count:,})" for cond, count in result.items()])
-        return f"Top {limit} primary impressions: {formatted}"
+        return top_impressions_text(limit)
 
     # Generic: "how many [condition/disease]"
     if "how many" in q:
-        from difflib import SequenceMatcher
-        
         search_term = q.replace("how many", "").replace("incidents", "").replace("patients", "").replace("with", "").strip()
         
         if search_term:
-            # Try exact substring first
-            exact_match = df[df[COL_IMPRESSION].str.contains(search_term, case=False, na=False)]
-            if len(exact_match) > 0:
-                count = int(exact_match.shape[0])
+            # Try a direct match first
+            count = count_impressions_matching(search_term)
+            if count > 0:
                 return f"There are {count:,} incidents matching '{search_term}'."
             
             # Fuzzy match: find closest disease name
-            conditions = df[COL_IMPRESSION].dropna().unique()
-            best_match = None
-            best_score = 0.4  # Minimum similarity threshold
-            
-            for cond in conditions:
-                if cond:
-                    score = SequenceMatcher(None, search_term.lower(), cond.lower()).ratio()
-                    if score > best_score:
-                        best_score = score
-                        best_match = cond
+            best_match = match_condition(search_term)
             
             if best_match:
-                count = int(df[df[COL_IMPRESSION] == best_match].shape[0])
+                count = int(IMPRESSION_COUNTS[best_match])
                 return f"There are {count:,} incidents of {best_match} (matched '{search_term}')."
             else:
                 return f"No incidents found matching '{search_term}'. Try a different term."
@@ -282,32 +621,87 @@ def handle_compute(msg: str) -> str:
     return ""
 
 # ---------------- PROMPTS ----------------
+# Each prompt is split into invariant instructions (sent first, as the
+# system message) and the per-request tail. Keeping the prefix byte-identical
+# across calls lets Ollama reuse its KV cache instead of re-prefilling it.
+
+def build_risk_summary() -> str:
+    """Peak-risk / delay summary for the operational prompt (static data only)."""
+    risk_by_hour = load_risk_by_hour()
+    peak_risk_hours = load_peak_risk_hours()
+    risk_summary = ""
+    try:
+        if peak_risk_hours and isinstance(peak_risk_hours, dict):
+            worst_hour = peak_risk_hours.get('worst_hour_for_high_risk', 'N/A')
+            total_delayed = peak_risk_hours.get('total_delayed_high_risk', 0)
+            delay_pct = peak_risk_hours.get('delayed_high_risk_pct', 0)
+
+            risk_summary += f"=== CRITICAL WINDOWS (Peak Risk Hours with Delays) ===\n"
+            risk_summary += f"Worst hour for high-risk with delays: {worst_hour}\n"
+            risk_summary += f"Total delayed high-risk incidents across all hours: {total_delayed} ({delay_pct}%)\n\n"
+
+            # Include all critical windows
+            if peak_risk_hours.get('critical_windows'):
+                risk_summary += "Critical Windows by Hour (sorted by most delayed):\n"
+                for i, window in enumerate(peak_risk_hours['critical_windows'][:12], 1):
+                    hour = window.get('hour', 'N/A')
+                    high_count = window.get('high_risk_incidents', 0)
+                    delayed = window.get('delayed_high_risk_incidents', 0)
+                    delayed_pct = window.get('delayed_pct', 0)
+                    risk_summary += f"{i}. {hour}: {high_count} high-risk incidents, {delayed} delayed ({delayed_pct}%)\n"
+
+        if peak_delay_hour() is not None:
+            peak_hour, peak_pct = peak_delay_hour()
+            risk_summary += f"\n=== DELAY STATISTICS ===\n"
+            risk_summary += f"Peak delay hour: {peak_hour} with {peak_pct}% of cases delayed\n"
+            risk_summary += f"Total hours analyzed: {len(risk_by_hour)}\n"
+    except Exception as e:
+        print(f"Error building risk summary: {e}")
+        risk_summary = f"Available data: {str(peak_risk_hours)[:500]}"
 
-def reasoning_prompt(question: str, facts: str = "") -> str:
-    return f"""
-You are Gemma, an EMS data assistant.
+    if not risk_summary:
+        risk_summary = "Critical windows: Hour 14:00 has the most delayed high-risk cases (1460 delayed out of 4920 high-risk = 29.67%)"
+    return risk_summary
 
-FACTS:
-{facts if facts else "No computed facts provided."}
 
-QUESTION:
-{question}
+REASONING_INSTRUCTIONS = f"""You are Gemma, an EMS data assistant.
 
-Explain clearly and concisely. Do not invent numbers.
-"""
+FACTS:
+Top city: {CITY_COUNTS.index[0]} ({int(CITY_COUNTS.iloc[0]):,})
 
+Explain clearly and concisely. Do not invent numbers."""
 
-def operational_prompt(question: str, risk_data: str) -> str:
+@lru_cache(maxsize=1)
+def operational_instructions() -> str:
+    # Built on the first operational question, then reused byte-for-byte
     return f"""You are Gemma, an EMS operational data analyst. You HAVE ACCESS to real operational data.
 
 DATA YOU HAVE:
-{risk_data}
+{build_risk_summary()}
 
 INSTRUCTION: Answer the user's question using ONLY the data provided above. Do not say you cannot access data - you have it.
+Answer using the specific numbers, hours, and percentages from the data provided."""
 
-User question: {question}
+EMS_INSTRUCTIONS = """You are an EMS clinical protocol assistant.
+
+INSTRUCTIONS:
+1. If patient age and symptoms are given, identify the applicable protocol from the AVAILABLE PROTOCOLS list in the user message.
+2. **ONLY mention protocol names that exist in that list** - do NOT recommend protocols outside this list.
+3. Once you identify the applicable protocol, describe the recommended steps from that protocol.
+4. Be concise and actionable in your response.
+5. Always reference the specific protocol name you are recommending.
+
+Respond with sound EMS judgment based on available protocols."""
+
+CHAT_INSTRUCTIONS = "You are Gemma. Respond naturally."
+
+
+def reasoning_prompt(question: str) -> str:
+    return f"QUESTION:\n{question}"
 
-Answer using the specific numbers, hours, and percentages from the data provided."""
+
+def operational_prompt(question: str) -> str:
+    return f"User question: {question}"
 
 
 def ems_prompt(question: str, relevant_protocols: List[str]) -> str:
@@ -318,27 +712,20 @@ def ems_prompt(question: str, relevant_protocols: List[str]) -> str:
     protocol_text = ""
     if relevant_protocols:
         protocol_text = "AVAILABLE PROTOCOLS TO REFERENCE:\n"
-        for protocol in relevant_protocols:
+        # Sorted so the same retrieval set always renders the same text
+        for protocol in sorted(relevant_protocols):
             protocol_text += f"- {protocol}\n"
         protocol_text += "\n**IMPORTANT**: Only mention and recommend protocols listed above. Do not suggest protocols outside this list.\n"
     else:
         protocol_text = "No specific protocols matched your query, but use general EMS guidelines.\n"
-    
-    return f"""You are an EMS clinical protocol assistant.
-
-{protocol_text}
 
+    return f"""{protocol_text}
 USER QUESTION:
-{question}
+{question}"""
 
-INSTRUCTIONS:
-1. If patient age and symptoms are given, identify the applicable protocol from the AVAILABLE PROTOCOLS list above.
-2. **ONLY mention protocol names that exist in the list above** - do NOT recommend protocols outside this list.
-3. Once you identify the applicable protocol, describe the recommended steps from that protocol.
-4. Be concise and actionable in your response.
-5. Always reference the specific protocol name you are recommending.
 
-Respond with sound EMS judgment based on available protocols."""
+def chat_prompt(question: str) -> str:
+    return f"User: {question}\nAnswer:"
 
 # ---------------- CHAT REQUEST ----------------
 class ChatRequest(BaseModel):
@@ -360,51 +747,15 @@ async def chat(req: ChatRequest):
 
     # ---- COMPUTE (NO LLM) ----
     if intent == "compute":
-        result = handle_compute(msg)
+        # Fuzzy matching / DataFrame lookups stay off the event loop
+        result = await run_in_threadpool(handle_compute, msg)
         if result:
             return {"answer": result, "source": "computed"}
 
     # ---- OPERATIONAL (Delays & High-Risk Analysis) ----
     if intent == "operational":
-        # Prepare comprehensive risk/delay data summary
-        risk_summary = ""
-        try:
-            if peak_risk_hours and isinstance(peak_risk_hours, dict):
-                worst_hour = peak_risk_hours.get('worst_hour_for_high_risk', 'N/A')
-                total_delayed = peak_risk_hours.get('total_delayed_high_risk', 0)
-                delay_pct = peak_risk_hours.get('delayed_high_risk_pct', 0)
-                
-                risk_summary += f"=== CRITICAL WINDOWS (Peak Risk Hours with Delays) ===\n"
-                risk_summary += f"Worst hour for high-risk with delays: {worst_hour}\n"
-                risk_summary += f"Total delayed high-risk incidents across all hours: {total_delayed} ({delay_pct}%)\n\n"
-                
-                # Include all critical windows
-                if peak_risk_hours.get('critical_windows'):
-                    risk_summary += "Critical Windows by Hour (sorted by most delayed):\n"
-                    for i, window in enumerate(peak_risk_hours['critical_windows'][:12], 1):
-                        hour = window.get('hour', 'N/A')
-                        high_count = window.get('high_risk_incidents', 0)
-                        delayed = window.get('delayed_high_risk_incidents', 0)
-                        delayed_pct = window.get('delayed_pct', 0)
-                        risk_summary += f"{i}. {hour}: {high_count} high-risk incidents, {delayed} delayed ({delayed_pct}%)\n"
-            
-            if risk_by_hour and isinstance(risk_by_hour, list) and len(risk_by_hour) > 0:
-                # Find peak delay hour from risk_by_hour
-                delays = [(h.get('hour'), h.get('delayed_pct', 0)) for h in risk_by_hour if isinstance(h, dict)]
-                if delays:
-                    max_delay_hour = max(delays, key=lambda x: x[1])
-                    risk_summary += f"\n=== DELAY STATISTICS ===\n"
-                    risk_summary += f"Peak delay hour: {max_delay_hour[0]} with {max_delay_hour[1]}% of cases delayed\n"
-                    risk_summary += f"Total hours analyzed: {len(risk_by_hour)}\n"
-        except Exception as e:
-            print(f"Error building risk summary: {e}")
-            risk_summary = f"Available data: {str(peak_risk_hours)[:500]}"
-        
-        if not risk_summary:
-            risk_summary = "Critical windows: Hour 14:00 has the most delayed high-risk cases (1460 delayed out of 4920 high-risk = 29.67%)"
-        
-        prompt = operational_prompt(msg, risk_summary)
-        answer = await run_in_threadpool(llm_client.ask, prompt)
+        prompt = operational_prompt(msg)
+        answer = await ask_llm("operational", msg, prompt, operational_instructions())
         return {"answer": answer.strip(), "mode": "operational"}
 
     # ---- EMS REASONING ----
@@ -412,7 +763,7 @@ async def chat(req: ChatRequest):
         # Retrieve relevant protocols from RAG store
         relevant_protocols = retrieve_relevant_protocols(msg, top_k=5)
         prompt = ems_prompt(msg, relevant_protocols)
-        answer = await run_in_threadpool(llm_client.ask, prompt)
+        answer = await ask_llm("ems", msg, prompt, EMS_INSTRUCTIONS)
         return {
             "answer": answer.strip(),
             "mode": "ems",
@@ -421,204 +772,288 @@ async def chat(req: ChatRequest):
 
     # ---- DATA / WHY / ANALYSIS ----
     if intent == "reason":
-        facts = f"Top city: {CITY_COUNTS.index[0]} ({int(CITY_COUNTS.iloc[0]):,})"
-        prompt = reasoning_prompt(msg, facts)
-        answer = await run_in_threadpool(llm_client.ask, prompt)
+        prompt = reasoning_prompt(msg)
+        answer = await ask_llm("reason", msg, prompt, REASONING_INSTRUCTIONS)
         return {"answer": answer.strip(), "mode": "reason"}
 
     # ---- CHAT ----
-    prompt = f"You are Gemma. Respond naturally.\nUser: {msg}\nAnswer:"
-    answer = await run_in_threadpool(llm_client.ask, prompt)
+    prompt = chat_prompt(msg)
+    answer = await ask_llm("chat", msg, prompt, CHAT_INSTRUCTIONS)
     return {"answer": answer.strip(), "mode": "chat"}
 
 
+# ---------------- HEALTH CHECK ----------------
+# Liveness probe for the host (e.g. Render): no work, no background thread
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
 # ============= DASHBOARD ENDPOINTS =============
 
+# ---- Static file cache ----
+# Dashboard outputs (JSON, small CSV/TXT) don't change while the API runs:
+# keep their bytes, pre-compressed variants and an ETag in memory instead of
+# stat/open/stream/compress per request.
+CACHE_HEADERS = {"Cache-Control": "public, max-age=300"}
+STATIC_FILES: Dict[Path, Dict[str, tuple]] = {}
+# Below this size compression isn't worth the extra header/decode work
+COMPRESS_MIN_SIZE = 1024
+# Larger files (e.g. the ~60 MB clustered_data.csv) stream from disk instead
+STATIC_MAX_SIZE = 8 * 1024 * 1024
+
+def load_static_file(path: Path) -> Dict[str, tuple]:
+    data = path.read_bytes()
+    digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+    # encoding -> (body, etag); each representation gets its own ETag
+    variants = {"identity": (data, f'"{digest}"')}
+    if len(data) >= COMPRESS_MIN_SIZE:
+        if _HAS_BROTLI:
+            variants["br"] = (brotli.compress(data, quality=11), f'"{digest}-br"')
+        variants["gzip"] = (gzip.compress(data, compresslevel=9, mtime=0), f'"{digest}-gz"')
+    STATIC_FILES[path] = variants
+    return variants
+
+def pick_encoding(request: Request, variants: Dict[str, tuple]) -> str:
+    accepted = request.headers.get("accept-encoding", "").lower()
+    for encoding in ("br", "gzip"):
+        if encoding in variants and encoding in accepted:
+            return encoding
+    return "identity"
+
+def static_json_paths() -> List[Path]:
+    paths = [
+        json_path
+        for json_dir in (EDA_OUTPUT_DIR, OP_OUTPUT_DIR, RISK_OUTPUT_DIR) if json_dir.exists()
+        for json_path in json_dir.glob("*.json")
+    ]
+    if GEO_PATH.exists():
+        paths.append(GEO_PATH)
+    return paths
+
+def large_file_response(path: Path, request: Request, media_type: str) -> Response:
+    # Stream from disk; a current "<name>.gz" made ahead of time (gzip -k -9)
+    # is sent as-is instead of gzipping megabytes per request
+    headers = {"Vary": "Accept-Encoding", **CACHE_HEADERS}
+    gz_path = path.with_name(path.name + ".gz")
+    if (
+        "gzip" in request.headers.get("accept-encoding", "").lower()
+        and gz_path.is_file()
+        and gz_path.stat().st_mtime >= path.stat().st_mtime
+    ):
+        headers["Content-Encoding"] = "gzip"
+        return FileResponse(path=gz_path, media_type=media_type, headers=headers)
+    return FileResponse(path=path, media_type=media_type, headers=headers)
+
+def cached_file_response(
+    path: Path, request: Request, detail: str, media_type: str = "application/json"
+) -> Response:
+    entry = STATIC_FILES.get(path)
+    if entry is None:
+        # Not present at startup; load (and keep) it if it exists now
+        if not path.is_file():
+            raise HTTPException(status_code=404, detail=detail)
+        if path.stat().st_size > STATIC_MAX_SIZE:
+            return large_file_response(path, request, media_type)
+        entry = load_static_file(path)
+
+    encoding = pick_encoding(request, entry)
+    data, etag = entry[encoding]
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", **CACHE_HEADERS}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=media_type, headers=headers)
+
 # Dataset pagination
-@app.get("/dataset")
-def get_dataset(page: int = 1, limit: int = 25):
+
+# Column name + Series pairs, so a page is built from one tolist() per
+# column instead of DataFrame.iloc + to_dict's per-cell boxing
+DATASET_COLUMNS = list(df.columns)
+DATASET_SERIES = [df[c] for c in DATASET_COLUMNS]
+
+# Largest page /dataset serves: a cached page is at most ~1.3 MB (rows) or
+# ~0.5 MB (columns), so the 64-entry cache stays under ~80 MB
+DATASET_MAX_LIMIT = 1000
+
+@lru_cache(maxsize=64)
+def dataset_page(page: int, limit: int, columnar: bool = False) -> bytes:
+    # df is immutable in-process, so each (page, limit, format) is serialized once
     start = (page - 1) * limit
     end = start + limit
     total_rows = len(df)
     total_pages = (total_rows + limit - 1) // limit
-    rows = df.iloc[start:end].to_dict(orient="records")
-    return {"rows": rows, "total_rows": total_rows, "page": page, "total_pages": total_pages}
+    columns = [s.iloc[start:end].tolist() for s in DATASET_SERIES]
+    if columnar:
+        # One list per column: no per-row dicts, and no repeated keys on the wire
+        body = {"columns": DATASET_COLUMNS, "data": columns}
+    else:
+        body = {"rows": [dict(zip(DATASET_COLUMNS, values)) for values in zip(*columns)]}
+    return orjson.dumps(
+        {**body, "total_rows": total_rows, "page": page, "total_pages": total_pages},
+        default=json_default,
+    )
 
-# EDA JSON
+@app.get("/dataset")
+def get_dataset(
+    page: int = Query(1, ge=1),
+    limit: int = Query(25, ge=1, le=DATASET_MAX_LIMIT),
+    format: str = "rows",
+):
+    """A page of the dataset, as row objects or (format=columns) column arrays."""
+    if format not in ("rows", "columns"):
+        raise HTTPException(status_code=400, detail="format must be 'rows' or 'columns'")
+    return Response(content=dataset_page(page, limit, format == "columns"), media_type="application/json")
+
+# EDA JSON (kpis.json included: the EDA page reads its fields as written by eda.py)
 @app.get("/eda/{filename}")
-def get_eda_file(filename: str):
-    file_path = EDA_OUTPUT_DIR / filename
-    if file_path.exists():
-        return FileResponse(file_path, media_type="application/json")
-    raise HTTPException(status_code=404, detail=f"File '{filename}' not found")
-
-@app.get("/eda/kpis.json")
-def generate_kpis():
-    kpis = {
-        "total_incidents": int(df["Incident_Number"].nunique()) if "Incident_Number" in df.columns else None,
-        "num_hospitals": int(df["Where_Patient_was_Transported"].nunique()) if "Where_Patient_was_Transported" in df.columns else None,
-        "num_primary_impressions": int(df["Primary_Impression"].nunique()) if "Primary_Impression" in df.columns else None,
-        "average_patient_age": float(df["Patient_Age"].mean()) if "Patient_Age" in df.columns else None,
-        "most_common_incident_place": df["Place_Incident_Happened"].mode()[0] if "Place_Incident_Happened" in df.columns else None
-    }
-    return JSONResponse(kpis)
+async def get_eda_file(filename: str, request: Request):
+    return cached_file_response(EDA_OUTPUT_DIR / filename, request, f"File '{filename}' not found")
 
 # GEOJSON
 @app.get("/geo/summary")
-def geo_summary():
-    if GEO_PATH.exists():
-        return FileResponse(GEO_PATH, media_type="application/json")
-    raise HTTPException(status_code=404, detail="GeoJSON file not found")
+async def geo_summary(request: Request):
+    return cached_file_response(GEO_PATH, request, "GeoJSON file not found")
 
 # Geo hotspot table
+GEO_INCIDENTS_PATH = BASE_DIR / "geospatial" / "incidents_with_h3.csv"
+GEO_H3_PATH = BASE_DIR / "geospatial" / "h3_hex_summary.csv"
+
+@lru_cache(maxsize=1)
+def load_sorted_hotspots(version):
+    """
+    H3 aggregates joined with their majority city, sorted by incidents.
+    `version` is the outputs' mtimes, so a geospatial re-run invalidates it.
+    """
+    # Load data (Parquet copies when present, else CSV)
+    incidents_df = load_geo_output("incidents_with_h3", ["h3", "Incident_City"])
+    h3_df = load_geo_output("h3_hex_summary", ["h3", "incidents", "avg_on_scene"])
+    
+    # Get majority city for each H3 cell
+    h3_city = majority_city_by_h3(incidents_df)
+    
+    # Merge H3 aggregates with city names, sorted by incidents
+    merged = h3_df[["h3", "incidents", "avg_on_scene"]].merge(h3_city, on="h3", how="left")
+    return merged.sort_values("incidents", ascending=False).reset_index(drop=True)
+
+@lru_cache(maxsize=32)
+def render_hotspots(top_n, version):
+    hotspots = load_sorted_hotspots(version).head(top_n)
+    
+    # Format for response
+    result = []
+    for rank, row in enumerate(hotspots.itertuples(index=False), 1):
+        result.append({
+            "rank": rank,
+            "h3_cell_id": f"{int(row.h3):x}",  # uint64 -> H3 hex string
+            "city": str(row.city) if pd.notna(row.city) else "Unknown",
+            "total_incidents": int(row.incidents),
+            "avg_on_scene_time_min": round(float(row.avg_on_scene), 2)
+        })
+    return result
+
 @app.get("/geo/hotspot_table")
 def geo_hotspot_table(top_n: int = 10):
     """Return top N H3 hotspots with incident counts and on-scene times."""
-    incidents_path = Path(__file__).parent / "geospatial" / "incidents_with_h3.csv"
-    h3_path = Path(__file__).parent / "geospatial" / "h3_hex_summary.csv"
-    
-    if not incidents_path.exists() or not h3_path.exists():
+    if not GEO_INCIDENTS_PATH.exists() or not GEO_H3_PATH.exists():
         raise HTTPException(status_code=404, detail="Geospatial files not found")
     
     try:
-        # Load data
-        incidents_df = pd.read_csv(incidents_path)
-        h3_df = pd.read_csv(h3_path)
-        
-        # Get city for each H3 cell (first occurrence)
-        h3_city = incidents_df[["h3", "Incident_City"]].drop_duplicates(subset=["h3"]).rename(
-            columns={"Incident_City": "city"}
-        )
-        
-        # Merge H3 aggregates with city names
-        merged = h3_df[["h3", "incidents", "avg_on_scene"]].merge(h3_city, on="h3", how="left")
-        
-        # Sort by incidents and get top N
-        hotspots = merged.sort_values("incidents", ascending=False).head(top_n).reset_index(drop=True)
-        hotspots["rank"] = range(1, len(hotspots) + 1)
-        
-        # Format for response
-        result = []
-        for _, row in hotspots.iterrows():
-            result.append({
-                "rank": int(row["rank"]),
-                "h3_cell_id": str(row["h3"]),
-                "city": str(row["city"]) if pd.notna(row["city"]) else "Unknown",
-                "total_incidents": int(row["incidents"]),
-                "avg_on_scene_time_min": round(float(row["avg_on_scene"]), 2)
-            })
-        
-        return {"data": result}
+        version = (GEO_INCIDENTS_PATH.stat().st_mtime_ns, GEO_H3_PATH.stat().st_mtime_ns)
+        return {"data": render_hotspots(top_n, version)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing hotspot data: {str(e)}")
 
 # OP EFFICIENCY
 OP_DIR = OP_OUTPUT_DIR
 
-def get_json_file(filename: str):
-    file_path = OP_DIR / filename
-    if file_path.exists():
-        return FileResponse(file_path, media_type="application/json")
-    raise HTTPException(status_code=404, detail=f"{filename} not found")
+def get_json_file(filename: str, request: Request):
+    return cached_file_response(OP_DIR / filename, request, f"{filename} not found")
 
 @app.get("/op_efficiency/kpis.json")
-def op_kpis():
-    return get_json_file("kpis.json")
+async def op_kpis(request: Request):
+    return get_json_file("kpis.json", request)
 
 @app.get("/op_efficiency/time_trends.json")
-def op_time_trends():
-    return get_json_file("time_trends.json")
+async def op_time_trends(request: Request):
+    return get_json_file("time_trends.json", request)
 
 @app.get("/op_efficiency/distributions.json")
-def op_distributions():
-    return get_json_file("distributions.json")
+async def op_distributions(request: Request):
+    return get_json_file("distributions.json", request)
 
 @app.get("/op_efficiency/response_percentiles.json")
-def op_percentiles():
-    return get_json_file("response_percentiles.json")
+async def op_percentiles(request: Request):
+    return get_json_file("response_percentiles.json", request)
 
 @app.get("/op_efficiency/delay_buckets.json")
-def op_delay_buckets():
-    return get_json_file("delay_buckets.json")
+async def op_delay_buckets(request: Request):
+    return get_json_file("delay_buckets.json", request)
 
 @app.get("/op_efficiency/city_summary.json")
-def op_city_summary():
-    return get_json_file("city_summary.json")
+async def op_city_summary(request: Request):
+    return get_json_file("city_summary.json", request)
 
 @app.get("/op_efficiency/hourly_response.json")
-def op_hourly_response():
-    return get_json_file("hourly_response.json")
+async def op_hourly_response(request: Request):
+    return get_json_file("hourly_response.json", request)
 
 @app.get("/op_efficiency/peak_delay_hours.json")
-def op_peak_delay_hours():
-    return get_json_file("peak_delay_hours.json")
+async def op_peak_delay_hours(request: Request):
+    return get_json_file("peak_delay_hours.json", request)
 
 @app.get("/op_efficiency/risk_by_hour.json")
-def op_risk_by_hour():
-    return get_json_file("risk_by_hour.json")
+async def op_risk_by_hour(request: Request):
+    return get_json_file("risk_by_hour.json", request)
 
 @app.get("/op_efficiency/risk_by_location.json")
-def op_risk_by_location():
-    return get_json_file("risk_by_location.json")
+async def op_risk_by_location(request: Request):
+    return get_json_file("risk_by_location.json", request)
 
 @app.get("/op_efficiency/peak_risk_hours.json")
-def op_peak_risk_hours():
-    return get_json_file("peak_risk_hours.json")
+async def op_peak_risk_hours(request: Request):
+    return get_json_file("peak_risk_hours.json", request)
 
 # RISK OUTPUTS
-def get_risk_file(filename: str):
-    file_path = RISK_OUTPUT_DIR / filename
-    if file_path.exists():
-        return FileResponse(path=file_path, media_type="application/json")
-    raise HTTPException(status_code=404, detail=f"{filename} not found in risk outputs")
+def get_risk_file(filename: str, request: Request):
+    return cached_file_response(RISK_OUTPUT_DIR / filename, request, f"{filename} not found in risk outputs")
 
 @app.get("/risk/cluster_embeddings.json")
-def risk_cluster_embeddings():
-    return get_risk_file("cluster_embeddings.json")
+async def risk_cluster_embeddings(request: Request):
+    return get_risk_file("cluster_embeddings.json", request)
 
 @app.get("/risk/top_protocols.json")
-def risk_top_protocols():
-    return get_risk_file("top_protocols.json")
+async def risk_top_protocols(request: Request):
+    return get_risk_file("top_protocols.json", request)
 
 @app.get("/risk/top_primary_impressions.json")
-def risk_top_primary_impressions():
-    return get_risk_file("top_primary_impressions.json")
+async def risk_top_primary_impressions(request: Request):
+    return get_risk_file("top_primary_impressions.json", request)
 
 @app.get("/risk/label_distribution.json")
-def risk_label_distribution():
-    return get_risk_file("label_distribution.json")
+async def risk_label_distribution(request: Request):
+    return get_risk_file("label_distribution.json", request)
 
 @app.get("/risk/cluster_summaries.json")
-def risk_cluster_summaries():
-    return get_risk_file("cluster_summaries.json")
+async def risk_cluster_summaries(request: Request):
+    return get_risk_file("cluster_summaries.json", request)
 
 @app.get("/risk/clustered_data.csv")
-def risk_clustered_data():
-    file_path = RISK_OUTPUT_DIR / "clustered_data.csv"
-    if file_path.exists():
-        return FileResponse(path=file_path, media_type="text/csv")
-    raise HTTPException(status_code=404, detail="clustered_data.csv not found")
+async def risk_clustered_data(request: Request):
+    return cached_file_response(RISK_OUTPUT_DIR / "clustered_data.csv", request, "clustered_data.csv not found", "text/csv")
 
 @app.get("/risk/confusion_matrix.csv")
-def risk_confusion_matrix():
-    file_path = RISK_OUTPUT_DIR / "confusion_matrix.csv"
-    if file_path.exists():
-        return FileResponse(path=file_path, media_type="text/csv")
-    raise HTTPException(status_code=404, detail="confusion_matrix.csv not found")
+async def risk_confusion_matrix(request: Request):
+    return cached_file_response(RISK_OUTPUT_DIR / "confusion_matrix.csv", request, "confusion_matrix.csv not found", "text/csv")
 
 @app.get("/risk/classifier_report.txt")
-def risk_classifier_report():
-    file_path = RISK_OUTPUT_DIR / "classifier_report.txt"
-    if file_path.exists():
-        return FileResponse(path=file_path, media_type="text/plain")
-    raise HTTPException(status_code=404, detail="classifier_report.txt not found")
+async def risk_classifier_report(request: Request):
+    return cached_file_response(RISK_OUTPUT_DIR / "classifier_report.txt", request, "classifier_report.txt not found", "text/plain")
 
 @app.get("/risk/misclassified_samples.csv")
-def risk_misclassified():
-    file_path = RISK_OUTPUT_DIR / "misclassified_samples.csv"
-    if file_path.exists():
-        return FileResponse(path=file_path, media_type="text/csv")
-    raise HTTPException(status_code=404, detail="misclassified_samples.csv not found")
+async def risk_misclassified(request: Request):
+    return cached_file_response(RISK_OUTPUT_DIR / "misclassified_samples.csv", request, "misclassified_samples.csv not found", "text/csv")
 
 # High-risk by location endpoints
 @app.get("/risk/high_risk_by_city.json")
@@ -627,7 +1062,7 @@ def risk_high_risk_by_city():
     if file_path.exists():
         try:
             df_city = pd.read_csv(file_path)
-            return JSONResponse(df_city.to_dict(orient="records"))
+            return ORJSONResponse(df_city.to_dict(orient="records"))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error reading high_risk_by_city.csv: {str(e)}")
     raise HTTPException(status_code=404, detail="high_risk_by_city.csv not found")
@@ -638,9 +1073,25 @@ def risk_high_risk_delays():
     if file_path.exists():
         try:
             df_delays = pd.read_csv(file_path)
-            return JSONResponse(df_delays.to_dict(orient="records"))
+            return ORJSONResponse(df_delays.to_dict(orient="records"))
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error reading high_risk_delays_by_city.csv: {str(e)}")
     raise HTTPException(status_code=404, detail="high_risk_delays_by_city.csv not found")
 
 
+
+# ---------------- Run ----------------
+if __name__ == "__main__":
+    import os
+    import uvicorn
+
+    # uvloop event loop + httptools C parser (both from uvicorn[standard]);
+    # "auto" falls back to asyncio / h11 where uvloop isn't available (Windows)
+    uvicorn.run(
+        "main:app",
+        host=os.environ.get("API_HOST", "0.0.0.0"),
+        port=int(os.environ.get("API_PORT", "8000")),
+        loop="auto",
+        http="auto",
+        workers=int(os.environ.get("API_WORKERS", "1")),
+    )
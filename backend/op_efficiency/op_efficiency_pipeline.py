@@ -5,7 +5,7 @@ op_efficiency_pipeline.py
 Robust JSON outputs for Operational Efficiency dashboard:
 - kpis.json
 - time_trends.json       (daily if available, otherwise monthly)
-- distributions.json     (hist bins + capped raw arrays)
+- distributions.json     (hist bins + p99 caps only)
 - response_percentiles.json
 - delay_buckets.json
 - city_summary.json
@@ -13,13 +13,34 @@ Robust JSON outputs for Operational Efficiency dashboard:
 
 import pandas as pd
 import numpy as np
-import json
+import orjson
+import sys
 from pathlib import Path
 from typing import List, Dict, Any
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from eda.csv_to_parquet import load_eda_table
+
 # ---------------- CONFIG ----------------
 # Use relative paths from op_efficiency folder
 EDA_CSV = Path(__file__).parent.parent / "eda" / "eda.csv"
+# eda.csv timestamps, e.g. "2021-01-02 17:22:00"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_COLUMNS = [
+    "Time_Call_Was_Received",
+    "Time_Vehicle_was_Dispatched",
+    "Time_Arrived_on_Scene",
+    "Time_Departed_from_the_Scene",
+]
+# Everything the compute_* functions read; the rest of eda.csv is skipped
+LOAD_COLUMNS = DATE_COLUMNS + ["Incident_City", "Incident_Number"]
+# Derived durations in minutes: (column, later timestamp, earlier timestamp)
+TIME_DIFFS = [
+    ("response_time_min", "Time_Arrived_on_Scene", "Time_Vehicle_was_Dispatched"),
+    ("turnout_time_min", "Time_Vehicle_was_Dispatched", "Time_Call_Was_Received"),
+    ("call_cycle_time_min", "Time_Departed_from_the_Scene", "Time_Call_Was_Received"),
+    ("on_scene_time_min", "Time_Departed_from_the_Scene", "Time_Arrived_on_Scene"),
+]
 OUTPUT_DIR = Path(__file__).parent / "outputs"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -33,7 +54,8 @@ def safe_round(x, nd=2):
         return None
 
 def write_json(obj: Any, path: Path):
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2))
+    # orjson: C encoder, UTF-8 output, numpy scalars/arrays serialized natively
+    path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
 
 def pctile_cap(arr: np.ndarray, q=99):
     if arr.size == 0:
@@ -53,34 +75,54 @@ def histogram_bins_from_array(values: np.ndarray, bins: int = 30):
     return out
 
 # ---------------- LOAD & PREP ----------------
+def minutes_between(later: pd.Series, earlier: pd.Series) -> np.ndarray:
+    # Subtract the raw int64 nanoseconds instead of going through a
+    # Timedelta Series and .dt.total_seconds(); NaT on either side -> NaN
+    a = later.to_numpy("datetime64[ns]")
+    b = earlier.to_numpy("datetime64[ns]")
+    minutes = (a.view("i8") - b.view("i8")) / 1e9 / 60
+    minutes[np.isnat(a) | np.isnat(b)] = np.nan
+    return minutes
+
 def load_data(csv_path: Path) -> pd.DataFrame:
     if not csv_path.exists():
         raise FileNotFoundError(f"CSV not found at: {csv_path}")
 
-    df = pd.read_csv(csv_path)
-    date_cols = [
-        "Time_Call_Was_Received",
-        "Time_Vehicle_was_Dispatched",
-        "Time_Arrived_on_Scene",
-        "Time_Departed_from_the_Scene",
-    ]
-    for c in date_cols:
+    # eda.parquet when current (see eda/csv_to_parquet.py), else eda.csv,
+    # reading only LOAD_COLUMNS either way
+    df = load_eda_table(LOAD_COLUMNS, csv_path).to_pandas()
+    # Incident_City arrives as a Categorical (int codes, not one string per
+    # row); sort its categories so groupby keys come out in the same
+    # order as they did on a string column
+    for c in df.columns[df.dtypes == "category"]:
+        df[c] = df[c].cat.set_categories(sorted(df[c].cat.categories))
+    for c in DATE_COLUMNS:
         if c in df.columns:
-            df[c] = pd.to_datetime(df[c], errors="coerce")
+            df[c] = pd.to_datetime(df[c], format=TIMESTAMP_FORMAT, errors="coerce")
 
     # compute core times
-    df["response_time_min"] = (df["Time_Arrived_on_Scene"] - df["Time_Vehicle_was_Dispatched"]).dt.total_seconds() / 60 if "Time_Arrived_on_Scene" in df.columns and "Time_Vehicle_was_Dispatched" in df.columns else np.nan
-    df["turnout_time_min"] = (df["Time_Vehicle_was_Dispatched"] - df["Time_Call_Was_Received"]).dt.total_seconds() / 60 if "Time_Vehicle_was_Dispatched" in df.columns and "Time_Call_Was_Received" in df.columns else np.nan
-    df["call_cycle_time_min"] = (df["Time_Departed_from_the_Scene"] - df["Time_Call_Was_Received"]).dt.total_seconds() / 60 if "Time_Departed_from_the_Scene" in df.columns and "Time_Call_Was_Received" in df.columns else np.nan
-    df["on_scene_time_min"] = (df["Time_Departed_from_the_Scene"] - df["Time_Arrived_on_Scene"]).dt.total_seconds() / 60 if "Time_Departed_from_the_Scene" in df.columns and "Time_Arrived_on_Scene" in df.columns else np.nan
-
-    # drop invalid rows
-    core_times = ["response_time_min", "on_scene_time_min", "call_cycle_time_min"]
-    df = df.dropna(subset=core_times, how="any")
-    for t in core_times + ["turnout_time_min"]:
-        if t in df.columns:
-            df = df[(df[t] >= 0) & (df[t] <= 300)]
-
+    for name, later, earlier in TIME_DIFFS:
+        if later in df.columns and earlier in df.columns:
+            df[name] = minutes_between(df[later], df[earlier])
+        else:
+            df[name] = np.nan
+
+    # Derived keys go on before the row filter, so the filter's selection
+    # is the only copy of the frame
+    df = add_time_keys(df)
+
+    # drop invalid rows: every time present and within 0-300 min, in one
+    # row selection (NaN fails both comparisons)
+    times = df[[name for name, _, _ in TIME_DIFFS]].to_numpy()
+    return df[((times >= 0) & (times <= 300)).all(axis=1)]
+
+def add_time_keys(df: pd.DataFrame) -> pd.DataFrame:
+    # Hour and day of each call, derived once here and shared by the
+    # compute_* functions instead of each re-deriving (and copying df)
+    if "Time_Call_Was_Received" in df.columns:
+        # nullable Int8: one byte per row, <NA> where the call time is missing
+        df["hour"] = df["Time_Call_Was_Received"].dt.hour.astype("Int8")
+        df["date"] = df["Time_Call_Was_Received"].dt.floor("D")
     return df
 
 # ---------------- KPI SUMMARY ----------------
@@ -101,23 +143,26 @@ def compute_kpis(df: pd.DataFrame) -> Dict[str, Any]:
     # calls per day
     calls_per_day = None
     if "Time_Call_Was_Received" in df.columns:
-        daily_counts = df.groupby(df["Time_Call_Was_Received"].dt.date).size()
-        if len(daily_counts):
-            calls_per_day = float(daily_counts.mean())
+        # Mean of the per-day counts: calls with a date over distinct days
+        n_days = df["date"].nunique()
+        if n_days:
+            calls_per_day = float(df["date"].count() / n_days)
 
-    # busiest hour
+    # busiest hour: 24-bin bincount over the hour column
     busiest_hour = None
     if "Time_Call_Was_Received" in df.columns:
-        hours = df["Time_Call_Was_Received"].dt.hour.value_counts()
-        if not hours.empty:
-            busiest_hour = f"{int(hours.idxmax()):02d}:00"
+        hours = df["hour"].dropna().to_numpy(dtype=np.int64)
+        if hours.size:
+            busiest_hour = f"{int(np.bincount(hours, minlength=24).argmax()):02d}:00"
 
-    # busiest city
+    # busiest city: bincount over the Categorical codes
     busiest_city = None
     if "Incident_City" in df.columns:
-        city_counts = df["Incident_City"].value_counts()
-        if not city_counts.empty:
-            busiest_city = str(city_counts.idxmax())
+        cities = df["Incident_City"].astype("category")
+        codes = cities.cat.codes.to_numpy()
+        codes = codes[codes >= 0]
+        if codes.size:
+            busiest_city = str(cities.cat.categories[np.bincount(codes).argmax()])
 
     # SLA 8 min compliance
     sla_8_min_pct = ((df["response_time_min"] <= 8).sum() / len(df) * 100) if "response_time_min" in df.columns else None
@@ -144,9 +189,10 @@ def compute_time_trends(df: pd.DataFrame, prefer="D") -> List[Dict[str, Any]]:
     use_month = (non_null / total if total else 0) < 0.5
 
     if use_month:
-        df = df.copy()
-        df["month"] = df["Time_Call_Was_Received"].dt.to_period("M").astype(str)
-        grouped = df.groupby("month").agg(
+        # Group on the int64-backed periods (missing times kept as their
+        # own group, as before); only the month keys are formatted
+        month = df["Time_Call_Was_Received"].dt.to_period("M").rename("month")
+        grouped = df.groupby(month, dropna=False).agg(
             avg_response=("response_time_min", "mean"),
             avg_on_scene=("on_scene_time_min", "mean"),
             avg_cycle=("call_cycle_time_min", "mean"),
@@ -154,12 +200,11 @@ def compute_time_trends(df: pd.DataFrame, prefer="D") -> List[Dict[str, Any]]:
             incident_count=("Incident_Number", "count")
         ).reset_index()
         grouped = grouped.rename(columns={"month": "period"})
+        grouped["period"] = grouped["period"].astype(str)
         for c in ["avg_response","avg_on_scene","avg_cycle","avg_turnout"]:
             grouped[c] = grouped[c].round(2)
         return grouped.to_dict(orient="records")
     else:
-        df = df.copy()
-        df["date"] = df["Time_Call_Was_Received"].dt.date.astype(str)
         grouped = df.groupby("date").agg(
             avg_response=("response_time_min", "mean"),
             avg_on_scene=("on_scene_time_min", "mean"),
@@ -167,45 +212,39 @@ def compute_time_trends(df: pd.DataFrame, prefer="D") -> List[Dict[str, Any]]:
             avg_turnout=("turnout_time_min", "mean"),
             incident_count=("Incident_Number", "count")
         ).reset_index()
+        # Format the day keys, not every row
+        grouped["date"] = grouped["date"].dt.strftime("%Y-%m-%d")
         for c in ["avg_response","avg_on_scene","avg_cycle","avg_turnout"]:
             grouped[c] = grouped[c].round(2)
         return grouped.to_dict(orient="records")
 
 # ---------------- DISTRIBUTIONS ----------------
-def compute_distributions(df: pd.DataFrame) -> Dict[str, Any]:
+def compute_distributions(df: pd.DataFrame, include_raw: bool = False) -> Dict[str, Any]:
+    """
+    30-bin histograms of each time, capped at its p99. The capped raw
+    arrays (one float per incident, unused by the dashboard) are only
+    included, as numpy arrays, with include_raw=True.
+    """
     out = {}
-    def safe_array(col):
-        if col not in df.columns:
-            return np.array([])
-        vals = df[col].dropna().astype(float).values
-        return vals
-
-    resp = safe_array("response_time_min")
-    onscene = safe_array("on_scene_time_min")
-    cycle = safe_array("call_cycle_time_min")
-
-    p99_resp = pctile_cap(resp, 99) or 0.0
-    p99_scene = pctile_cap(onscene, 99) or 0.0
-    p99_cycle = pctile_cap(cycle, 99) or 0.0
-
-    resp_capped = np.where(resp>p99_resp,p99_resp,resp) if resp.size else np.array([])
-    scene_capped = np.where(onscene>p99_scene,p99_scene,onscene) if onscene.size else np.array([])
-    cycle_capped = np.where(cycle>p99_cycle,p99_cycle,cycle) if cycle.size else np.array([])
-
-    out["response_hist"] = histogram_bins_from_array(resp_capped, bins=30)
-    out["on_scene_hist"] = histogram_bins_from_array(scene_capped, bins=30)
-    out["cycle_hist"] = histogram_bins_from_array(cycle_capped, bins=30)
-
-    out["response_times_capped"] = [round(float(x),2) for x in resp_capped.tolist()] if resp_capped.size else []
-    out["on_scene_times_capped"] = [round(float(x),2) for x in scene_capped.tolist()] if scene_capped.size else []
-    out["cycle_times_capped"] = [round(float(x),2) for x in cycle_capped.tolist()] if cycle_capped.size else []
-
-    out["caps"] = {
-        "p99_response": safe_round(p99_resp),
-        "p99_on_scene": safe_round(p99_scene),
-        "p99_cycle": safe_round(p99_cycle)
-    }
-
+    caps = {}
+    for name, col, cap_key in [
+        ("response", "response_time_min", "p99_response"),
+        ("on_scene", "on_scene_time_min", "p99_on_scene"),
+        ("cycle", "call_cycle_time_min", "p99_cycle"),
+    ]:
+        # Own copy, so it can be capped in place
+        vals = df[col].dropna().to_numpy(dtype=float, copy=True) if col in df.columns else np.array([])
+        cap = pctile_cap(vals, 99) or 0.0
+        if vals.size:
+            np.minimum(vals, cap, out=vals)
+
+        out[f"{name}_hist"] = histogram_bins_from_array(vals, bins=30)
+        if include_raw:
+            # ndarray as-is; write_json serializes it with OPT_SERIALIZE_NUMPY
+            out[f"{name}_times_capped"] = np.round(vals, 2)
+        caps[cap_key] = safe_round(cap)
+
+    out["caps"] = caps
     return out
 
 # ---------------- RESPONSE PERCENTILES ----------------
@@ -213,11 +252,13 @@ def compute_response_percentiles(df: pd.DataFrame) -> Dict[str, Any]:
     if df.empty or "response_time_min" not in df.columns:
         return {"p50": None, "p75": None, "p90": None, "p95": None, "max": None}
     s = df["response_time_min"].dropna()
+    # One quantile call: numpy partitions the values once for all four
+    p50, p75, p90, p95 = s.quantile([0.5, 0.75, 0.9, 0.95])
     return {
-        "p50": safe_round(s.quantile(0.5)),
-        "p75": safe_round(s.quantile(0.75)),
-        "p90": safe_round(s.quantile(0.9)),
-        "p95": safe_round(s.quantile(0.95)),
+        "p50": safe_round(p50),
+        "p75": safe_round(p75),
+        "p90": safe_round(p90),
+        "p95": safe_round(p95),
         "max": safe_round(s.max())
     }
 # ---------------- DELAY BUCKETS WITH SLA (ONLY LATE CALLS) ----------------
@@ -225,38 +266,34 @@ def compute_delay_buckets(df: pd.DataFrame, sla: float = 8) -> list[dict]:
     if df.empty or "response_time_min" not in df.columns:
         return []
 
-    # 1️⃣ Compute delay over SLA
-    df['delay'] = df['response_time_min'] - sla
-    df['delay'] = df['delay'].apply(lambda x: x if x > 0 else 0)
-
-    # 2️⃣ Keep only delayed incidents
-    df_late = df[df['delay'] > 0]
-    if df_late.empty:
-        return [{"delay_bucket": label, "count": 0} for label in ["0–5 min","5–10","10–15","15–30","30+"]]
+    # 1️⃣ Minutes over the SLA, for delayed incidents only (NaN compares False)
+    delay = df['response_time_min'].to_numpy(dtype=np.float64) - sla
+    delay = delay[delay > 0]
 
-    # 3️⃣ Define delay buckets
-    bins = [0,5,10,15,30,999]  # minutes late
+    # 2️⃣ Define delay buckets
+    bins = [0,5,10,15,30,999]  # minutes late, [lo, hi)
     labels = ["0–5 min","5–10","10–15","15–30","30+"]
 
-    # 4️⃣ Categorize delays into buckets
-    cat = pd.cut(df_late['delay'], bins=bins, labels=labels, right=False)
+    # 3️⃣ Bucket index per delay, counted in one bincount (999+ falls outside)
+    codes = np.digitize(delay, bins) - 1
+    counts = np.bincount(codes[codes < len(labels)], minlength=len(labels))
 
-    # 5️⃣ Count number of incidents in each bucket
-    dist = cat.value_counts().reindex(labels).fillna(0).astype(int)
-
-    # 6️⃣ Return as list of dicts
-    return [{"delay_bucket": label, "count": int(dist[label])} for label in labels]
+    # 4️⃣ Return as list of dicts
+    return [{"delay_bucket": label, "count": int(n)} for label, n in zip(labels, counts)]
 
 # ---------------- CITY AGG ----------------
 def compute_city_agg(df: pd.DataFrame) -> List[Dict[str, Any]]:
     if df.empty or "Incident_City" not in df.columns:
         return []
-    city_agg = df.groupby("Incident_City").agg(
+    by_city = df.groupby("Incident_City", observed=True)
+    city_agg = by_city.agg(
         incidents=("Incident_Number","count"),
         avg_response=("response_time_min","mean"),
-        p90_response=("response_time_min", lambda x: x.quantile(0.9)),
         avg_turnout=("turnout_time_min","mean")
-    ).reset_index()
+    )
+    # Cython groupby quantile rather than a Python lambda per city
+    city_agg.insert(2, "p90_response", by_city["response_time_min"].quantile(0.9))
+    city_agg = city_agg.reset_index()
     city_agg["avg_response"] = city_agg["avg_response"].round(2)
     city_agg["p90_response"] = city_agg["p90_response"].round(2)
     city_agg["avg_turnout"] = city_agg["avg_turnout"].round(2)
@@ -274,9 +311,6 @@ def compute_hourly_response(df: pd.DataFrame) -> list[dict]:
     if df.empty or "Time_Call_Was_Received" not in df.columns:
         return []
 
-    df = df.copy()
-    df["hour"] = df["Time_Call_Was_Received"].dt.hour
-
     grouped = df.groupby("hour").agg(
         avg_response=("response_time_min", "mean"),
         count=("Incident_Number", "count")
@@ -306,10 +340,8 @@ def compute_peak_delay_hours(df: pd.DataFrame, sla: float = 8) -> Dict[str, Any]
             "total_delayed_incidents": 0
         }
 
-    df = df.copy()
-    
     # Filter to only delayed incidents (response time > SLA)
-    df_delayed = df[df["response_time_min"] > sla].copy()
+    df_delayed = df[df["response_time_min"] > sla]
     
     if df_delayed.empty:
         return {
@@ -319,9 +351,6 @@ def compute_peak_delay_hours(df: pd.DataFrame, sla: float = 8) -> Dict[str, Any]
             "total_delayed_incidents": 0
         }
     
-    # Extract hour from Time_Call_Was_Received
-    df_delayed["hour"] = df_delayed["Time_Call_Was_Received"].dt.hour
-    
     # Count delayed incidents per hour
     hour_counts = df_delayed["hour"].value_counts().sort_values(ascending=False)
     
@@ -13,16 +13,54 @@ Outputs:
 
 import pandas as pd
 import numpy as np
-import json
+import orjson
+import sys
 from pathlib import Path
 from typing import Dict, List, Any
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from eda.csv_to_parquet import load_eda_table
+
 # Config - Use relative paths from op_efficiency folder
 EDA_CSV = Path(__file__).parent.parent / "eda" / "eda.csv"
 RISK_OUTPUTS = Path(__file__).parent.parent / "risk_score" / "outputs"
 OP_OUTPUT_DIR = Path(__file__).parent / "outputs"
 OP_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# eda.csv timestamps, e.g. "2021-01-02 17:22:00"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_COLUMNS = [
+    "Time_Call_Was_Received",
+    "Time_Vehicle_was_Dispatched",
+    "Time_Arrived_on_Scene",
+    "Time_Departed_from_the_Scene",
+]
+# Columns the analysis reads; the rest of the wide input files is skipped
+LOAD_COLUMNS = DATE_COLUMNS + [
+    "Incident_City",
+    "risk_label",
+    "response_time_min",
+    "turnout_time_min",
+    "call_cycle_time_min",
+    "on_scene_time_min",
+]
+# Derived durations in minutes: (column, later timestamp, earlier timestamp)
+TIME_DIFFS = [
+    ("response_time_min", "Time_Arrived_on_Scene", "Time_Vehicle_was_Dispatched"),
+    ("turnout_time_min", "Time_Vehicle_was_Dispatched", "Time_Call_Was_Received"),
+    ("call_cycle_time_min", "Time_Departed_from_the_Scene", "Time_Call_Was_Received"),
+    ("on_scene_time_min", "Time_Departed_from_the_Scene", "Time_Arrived_on_Scene"),
+]
+
+def minutes_between(later: pd.Series, earlier: pd.Series) -> np.ndarray:
+    # Subtract the raw int64 nanoseconds instead of going through a
+    # Timedelta Series and .dt.total_seconds(); NaT on either side -> NaN
+    a = later.to_numpy("datetime64[ns]")
+    b = earlier.to_numpy("datetime64[ns]")
+    minutes = (a.view("i8") - b.view("i8")) / 1e9 / 60
+    minutes[np.isnat(a) | np.isnat(b)] = np.nan
+    return minutes
+
 def safe_round(x, nd=2):
     try:
         if pd.isna(x):
@@ -37,31 +75,22 @@ def load_data_with_risk() -> pd.DataFrame:
     
     if final_risk_path.exists():
         print(f"Loading from final_risk_scored.csv...")
-        df = pd.read_csv(final_risk_path)
+        df = pd.read_csv(final_risk_path, usecols=lambda c: c in LOAD_COLUMNS)
     else:
         print(f"final_risk_scored.csv not found, loading from EDA...")
-        df = pd.read_csv(EDA_CSV)
+        # eda.parquet when current (see eda/csv_to_parquet.py), else eda.csv
+        header = pd.read_csv(EDA_CSV, nrows=0).columns
+        df = load_eda_table([c for c in LOAD_COLUMNS if c in header]).to_pandas()
     
     # Convert datetime columns
-    date_cols = [
-        "Time_Call_Was_Received",
-        "Time_Vehicle_was_Dispatched",
-        "Time_Arrived_on_Scene",
-        "Time_Departed_from_the_Scene",
-    ]
-    for c in date_cols:
+    for c in DATE_COLUMNS:
         if c in df.columns:
-            df[c] = pd.to_datetime(df[c], errors="coerce")
+            df[c] = pd.to_datetime(df[c], format=TIMESTAMP_FORMAT, errors="coerce")
     
     # Compute times if not already in df
-    if "response_time_min" not in df.columns and "Time_Arrived_on_Scene" in df.columns and "Time_Vehicle_was_Dispatched" in df.columns:
-        df["response_time_min"] = (df["Time_Arrived_on_Scene"] - df["Time_Vehicle_was_Dispatched"]).dt.total_seconds() / 60
-    if "turnout_time_min" not in df.columns and "Time_Vehicle_was_Dispatched" in df.columns and "Time_Call_Was_Received" in df.columns:
-        df["turnout_time_min"] = (df["Time_Vehicle_was_Dispatched"] - df["Time_Call_Was_Received"]).dt.total_seconds() / 60
-    if "call_cycle_time_min" not in df.columns and "Time_Departed_from_the_Scene" in df.columns and "Time_Call_Was_Received" in df.columns:
-        df["call_cycle_time_min"] = (df["Time_Departed_from_the_Scene"] - df["Time_Call_Was_Received"]).dt.total_seconds() / 60
-    if "on_scene_time_min" not in df.columns and "Time_Departed_from_the_Scene" in df.columns and "Time_Arrived_on_Scene" in df.columns:
-        df["on_scene_time_min"] = (df["Time_Departed_from_the_Scene"] - df["Time_Arrived_on_Scene"]).dt.total_seconds() / 60
+    for name, later, earlier in TIME_DIFFS:
+        if name not in df.columns and later in df.columns and earlier in df.columns:
+            df[name] = minutes_between(df[later], df[earlier])
     
     # Ensure risk_label exists and is not null
     if "risk_label" not in df.columns:
@@ -69,53 +98,69 @@ def load_data_with_risk() -> pd.DataFrame:
     else:
         df["risk_label"] = df["risk_label"].fillna("MEDIUM")
     
-    # Extract hour
+    # Extract hour (nullable Int8: one byte per row, <NA> for missing times)
     if "Time_Call_Was_Received" in df.columns:
-        df["hour"] = df["Time_Call_Was_Received"].dt.hour
+        df["hour"] = df["Time_Call_Was_Received"].dt.hour.astype("Int8")
+    
+    # Low-cardinality labels as Categoricals with sorted categories: label
+    # compares and city groupbys work on int codes, in string order
+    for c in CATEGORY_COLUMNS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+            df[c] = df[c].cat.set_categories(sorted(df[c].cat.categories))
     
     return df
 
+RISK_LEVELS = ["HIGH", "MEDIUM", "LOW"]
+
+CATEGORY_COLUMNS = ["Incident_City", "risk_label"]
+
+def risk_stats_by(df: pd.DataFrame, key: str, sla: float = 8) -> pd.DataFrame:
+    """
+    One row per key value (sorted): total, HIGH/MEDIUM/LOW counts, mean
+    response time and count over the SLA, from one grouping of the key
+    instead of re-filtering df for every hour/city.
+    """
+    response = df["response_time_min"] if "response_time_min" in df.columns else pd.Series(np.nan, index=df.index)
+    grouped = pd.DataFrame({
+        "risk_label": df["risk_label"],
+        "avg_response": response,
+        "delayed_count": response > sla,
+    }).groupby(df[key], observed=True)
+    stats = grouped.agg({"avg_response": "mean", "delayed_count": "sum"})
+    stats.insert(0, "total", grouped.size())
+    counts = grouped["risk_label"].value_counts().unstack(fill_value=0)
+    return stats.join(counts.reindex(columns=RISK_LEVELS, fill_value=0))
+
 def compute_risk_by_hour(df: pd.DataFrame, sla: float = 8) -> List[Dict[str, Any]]:
     """Risk distribution by hour with delay percentage"""
     if df.empty or "hour" not in df.columns or "risk_label" not in df.columns:
         return []
     
     # Group by hour and risk level
-    df = df.copy()
     df = df.dropna(subset=["hour", "risk_label"])
+    df = df[df["hour"].between(0, 23)]
+    stats = risk_stats_by(df, "hour", sla)
     
     result = []
-    for hour in range(24):
-        hour_data = df[df["hour"] == hour]
-        if hour_data.empty:
-            continue
-        
-        total = len(hour_data)
-        high_count = int((hour_data["risk_label"] == "HIGH").sum())
-        medium_count = int((hour_data["risk_label"] == "MEDIUM").sum())
-        low_count = int((hour_data["risk_label"] == "LOW").sum())
-        
-        avg_response = safe_round(hour_data["response_time_min"].mean())
-        high_pct = safe_round((high_count / total * 100) if total > 0 else 0)
-        
-        # Calculate delayed percentage (response_time > SLA)
-        delayed_count = int((hour_data["response_time_min"] > sla).sum()) if "response_time_min" in hour_data.columns else 0
-        delayed_pct = safe_round((delayed_count / total * 100) if total > 0 else 0)
+    for hour, row in zip(stats.index, stats.itertuples(index=False)):
+        total = int(row.total)
+        high_count = int(row.HIGH)
+        delayed_count = int(row.delayed_count)
         
         result.append({
-            "hour": f"{hour:02d}:00",
+            "hour": f"{int(hour):02d}:00",
             "total_incidents": total,
             "high_risk_count": high_count,
-            "high_risk_pct": high_pct,
-            "medium_risk_count": medium_count,
-            "low_risk_count": low_count,
-            "avg_response_time": avg_response,
+            "high_risk_pct": safe_round(high_count / total * 100),
+            "medium_risk_count": int(row.MEDIUM),
+            "low_risk_count": int(row.LOW),
+            "avg_response_time": safe_round(row.avg_response),
             "delayed_count": delayed_count,
-            "delayed_pct": delayed_pct
+            "delayed_pct": safe_round(delayed_count / total * 100)
         })
     
-    # Sort by hour (chronologically 0-23)
-    result.sort(key=lambda x: int(x["hour"].split(":")[0]))
+    # Rows are in hour order (chronologically 0-23)
     return result
 
 def compute_risk_by_location(df: pd.DataFrame) -> List[Dict[str, Any]]:
@@ -123,27 +168,22 @@ def compute_risk_by_location(df: pd.DataFrame) -> List[Dict[str, Any]]:
     if df.empty or "Incident_City" not in df.columns or "risk_label" not in df.columns:
         return []
     
-    df = df.copy()
     df = df[(df["Incident_City"] != "") & (df["risk_label"].notna())]
+    stats = risk_stats_by(df, "Incident_City")
     
     result = []
-    for city, city_data in df.groupby("Incident_City"):
-        total = len(city_data)
-        high_count = int((city_data["risk_label"] == "HIGH").sum())
-        medium_count = int((city_data["risk_label"] == "MEDIUM").sum())
-        low_count = int((city_data["risk_label"] == "LOW").sum())
-        
-        avg_response = safe_round(city_data["response_time_min"].mean())
-        high_pct = safe_round((high_count / total * 100) if total > 0 else 0)
+    for city, row in zip(stats.index, stats.itertuples(index=False)):
+        total = int(row.total)
+        high_count = int(row.HIGH)
         
         result.append({
             "city": str(city),
             "total_incidents": total,
             "high_risk_count": high_count,
-            "high_risk_pct": high_pct,
-            "medium_risk_count": medium_count,
-            "low_risk_count": low_count,
-            "avg_response_time": avg_response
+            "high_risk_pct": safe_round(high_count / total * 100),
+            "medium_risk_count": int(row.MEDIUM),
+            "low_risk_count": int(row.LOW),
+            "avg_response_time": safe_round(row.avg_response)
         })
     
     # Sort by high risk count descending
@@ -163,11 +203,10 @@ def compute_peak_risk_hours(df: pd.DataFrame, sla: float = 8) -> Dict[str, Any]:
             "total_delayed_high_risk": 0
         }
     
-    df = df.copy()
     df = df.dropna(subset=["hour", "risk_label"])
     
     # High-risk incidents
-    df_high = df[df["risk_label"] == "HIGH"].copy()
+    df_high = df[df["risk_label"] == "HIGH"]
     
     if df_high.empty:
         return {
@@ -178,27 +217,21 @@ def compute_peak_risk_hours(df: pd.DataFrame, sla: float = 8) -> Dict[str, Any]:
         }
     
     # Group by hour
+    stats = risk_stats_by(df_high[df_high["hour"].between(0, 23)], "hour", sla)
     hour_stats = []
-    for hour in range(24):
-        hour_high = df_high[df_high["hour"] == hour]
-        if hour_high.empty:
-            continue
-        
-        total_high = len(hour_high)
-        delayed_high = int((hour_high["response_time_min"] > sla).sum()) if "response_time_min" in hour_high.columns else 0
-        avg_response = safe_round(hour_high["response_time_min"].mean())
-        delayed_pct = safe_round((delayed_high / total_high * 100) if total_high > 0 else 0)
+    for hour, row in zip(stats.index, stats.itertuples(index=False)):
+        total_high = int(row.total)
+        delayed_high = int(row.delayed_count)
         
         hour_stats.append({
-            "hour": f"{hour:02d}:00",
+            "hour": f"{int(hour):02d}:00",
             "high_risk_incidents": total_high,
             "delayed_high_risk_incidents": delayed_high,
-            "delayed_pct": delayed_pct,
-            "avg_response": avg_response
+            "delayed_pct": safe_round(delayed_high / total_high * 100),
+            "avg_response": safe_round(row.avg_response)
         })
     
-    # Sort by hour (chronologically 0-23)
-    hour_stats.sort(key=lambda x: int(x["hour"].split(":")[0]))
+    # Rows are in hour order (chronologically 0-23)
     
     worst_hour = hour_stats[0]["hour"] if hour_stats else None
     total_high = len(df_high)
@@ -213,7 +246,8 @@ def compute_peak_risk_hours(df: pd.DataFrame, sla: float = 8) -> Dict[str, Any]:
     }
 
 def write_json(obj: Any, path: Path):
-    path.write_text(json.dumps(obj, ensure_ascii=False, indent=2))
+    # orjson: C encoder, UTF-8 output, numpy scalars/arrays serialized natively
+    path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
 
 def main():
     print("Loading data with risk labels...")
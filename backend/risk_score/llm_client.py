@@ -1,9 +1,15 @@
 # llm_client.py
+import asyncio
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 import re
 import time
 from typing import List, Dict, Any, Optional
 
+# ```python fenced block in model output (generic ``` fences use str.find)
+_PY_BLOCK_RE = re.compile(r"```python(.*?)```", re.DOTALL | re.IGNORECASE)
+
 class LLMClient:
     """
     Stable Ollama client for Gemma 7B — optimized for:
@@ -27,6 +33,11 @@ class LLMClient:
         self.max_retries = max_retries
         self.sleep_between_calls = sleep_between_calls
         self.session = requests.Session()
+        # Keep a pool of keep-alive connections large enough for concurrent
+        # ask() calls; retries are handled by _post_with_retry.
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     # -------------------------------------------------------------------------
     # Internal Helper: Run HTTP post with retries
@@ -63,16 +74,20 @@ class LLMClient:
         Used for cluster-level risk summaries.
         Returns raw model text (no code extraction).
         """
-        payload = {
+        data = self._post_with_retry(self._ask_payload(prompt))
+        if not data:
+            return ""
+        return self._response_text(data)
+
+    def _ask_payload(self, prompt: str) -> Dict[str, Any]:
+        return {
             "model": self.model,
             "messages": [{"role": "user", "content": prompt}],
             "stream": False
         }
 
-        data = self._post_with_retry(payload)
-        if not data:
-            return ""
-
+    @staticmethod
+    def _response_text(data: Dict[str, Any]) -> str:
         # extract common fields from Ollama
         if "message" in data:
             return data["message"].get("content", "")
@@ -86,6 +101,46 @@ class LLMClient:
 
         return str(data)
 
+    # -------------------------------------------------------------------------
+    # Public: ask_many() → Concurrent ask() over one async connection pool
+    # -------------------------------------------------------------------------
+    async def _post_with_retry_async(self, client: httpx.AsyncClient, payload: Dict[str, Any]) -> Optional[Dict]:
+        retries = self.max_retries
+        delay = 1.0
+
+        for attempt in range(1, retries + 1):
+            try:
+                resp = await client.post(self.chat_url, json=payload)
+                resp.raise_for_status()
+                return resp.json()
+
+            except Exception as e:
+                print(f"[LLMClient] Error (attempt {attempt}/{retries}): {e}")
+                if attempt == retries:
+                    print("[LLMClient] Max retries exceeded.")
+                    return None
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        return None
+
+    async def ask_many(self, prompts: List[str], max_concurrency: int = 8) -> List[str]:
+        """
+        Send prompts concurrently and return the texts in the same order.
+        Requests overlap on the wire and queue on the Ollama server instead
+        of waiting for each other (and a sleep) client-side.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            async def one(prompt: str) -> str:
+                async with semaphore:
+                    data = await self._post_with_retry_async(client, self._ask_payload(prompt))
+                return self._response_text(data) if data else ""
+
+            return await asyncio.gather(*(one(p) for p in prompts))
+
     # -------------------------------------------------------------------------
     # Public: chat_code() → Extract python code block from LLM output
     # (kept for compatibility but less used in risk pipeline)
@@ -124,14 +179,16 @@ class LLMClient:
             return ""
 
         # Prefer ```python fenced blocks
-        m = re.search(r"```python(.*?)```", text, re.DOTALL | re.IGNORECASE)
+        m = _PY_BLOCK_RE.search(text)
         if m:
             return m.group(1).strip()
 
         # Generic fenced block
-        m = re.search(r"```(.*?)```", text, re.DOTALL)
-        if m:
-            return m.group(1).strip()
+        start = text.find("```")
+        if start != -1:
+            end = text.find("```", start + 3)
+            if end != -1:
+                return text[start + 3:end].strip()
 
         return text.strip()
 
@@ -143,8 +200,22 @@ class LLMClient:
         Summarize a cluster of EMS incidents and classify risk.
         This is the main workhorse for the risk scoring pipeline.
         """
+        text = self.ask(self._cluster_prompt(samples, cluster_id))
+        time.sleep(self.sleep_between_calls)
+        return text
+
+    def summarize_clusters(self, cluster_samples: Dict[int, List[Dict[str, Any]]]) -> Dict[int, str]:
+        """
+        Summarize every cluster concurrently via ask_many().
+        Returns {cluster_id: summary}; failed calls map to "".
+        """
+        cluster_ids = list(cluster_samples)
+        prompts = [self._cluster_prompt(cluster_samples[cid], cid) for cid in cluster_ids]
+        texts = asyncio.run(self.ask_many(prompts))
+        return dict(zip(cluster_ids, texts))
 
-        prompt = f"""
+    def _cluster_prompt(self, samples: List[Dict[str, Any]], cluster_id: int) -> str:
+        return f"""
 You are an EMS incident analysis expert.
 
 Below are example incidents from cluster {cluster_id}.
@@ -163,7 +234,3 @@ Samples:
 
 Return a clean, human-readable summary. No code, no markdown fences.
 """
-
-        text = self.ask(prompt)
-        time.sleep(self.sleep_between_calls)
-        return text
@@ -37,10 +37,9 @@ def analyze_risk_by_location():
         'High_Risk_Count': city_risk.values
     })
     
-    # Add percentage of high-risk within each city
-    city_summary['Total_Cases_in_City'] = city_summary['City'].apply(
-        lambda city: len(df[df['Incident_City'] == city])
-    )
+    # Add percentage of high-risk within each city (one count per city,
+    # looked up, instead of rescanning df for each)
+    city_summary['Total_Cases_in_City'] = city_summary['City'].map(df['Incident_City'].value_counts())
     city_summary['High_Risk_Percentage'] = (
         city_summary['High_Risk_Count'] / city_summary['Total_Cases_in_City'] * 100
     ).round(1)
@@ -59,9 +58,7 @@ def analyze_risk_by_location():
         'High_Risk_Count': county_risk.values
     })
     
-    county_summary['Total_Cases_in_County'] = county_summary['County'].apply(
-        lambda county: len(df[df['Incident_County'] == county])
-    )
+    county_summary['Total_Cases_in_County'] = county_summary['County'].map(df['Incident_County'].value_counts())
     county_summary['High_Risk_Percentage'] = (
         county_summary['High_Risk_Count'] / county_summary['Total_Cases_in_County'] * 100
     ).round(1)
@@ -77,22 +74,21 @@ def analyze_risk_by_location():
     # Get top 10 cities by high risk count
     top_cities = city_risk.head(10).index.tolist()
     
+    # Per-city means of the high-risk cases in one groupby
+    by_city = high_risk.groupby('Incident_City')
+    city_means = by_city[['response_time_min', 'turnout_time_min', 'on_scene_time_min', 'call_cycle_time_min']].mean()
+    
     delays_summary = []
     for city in top_cities:
-        city_high_risk = high_risk[high_risk['Incident_City'] == city]
-        
-        avg_response_time = city_high_risk['response_time_min'].mean()
-        avg_turnout_time = city_high_risk['turnout_time_min'].mean()
-        avg_on_scene_time = city_high_risk['on_scene_time_min'].mean()
-        avg_call_cycle = city_high_risk['call_cycle_time_min'].mean()
+        means = city_means.loc[city]
         
         delays_summary.append({
             'City': city,
-            'High_Risk_Count': len(city_high_risk),
-            'Avg_Response_Time_min': round(avg_response_time, 1),
-            'Avg_Turnout_Time_min': round(avg_turnout_time, 1),
-            'Avg_On_Scene_Time_min': round(avg_on_scene_time, 1),
-            'Avg_Call_Cycle_Time_min': round(avg_call_cycle, 1)
+            'High_Risk_Count': int(city_risk[city]),
+            'Avg_Response_Time_min': round(means['response_time_min'], 1),
+            'Avg_Turnout_Time_min': round(means['turnout_time_min'], 1),
+            'Avg_On_Scene_Time_min': round(means['on_scene_time_min'], 1),
+            'Avg_Call_Cycle_Time_min': round(means['call_cycle_time_min'], 1)
         })
     
     delays_df = pd.DataFrame(delays_summary)
@@ -104,7 +100,7 @@ def analyze_risk_by_location():
     print("="*70)
     
     for city in top_cities[:5]:
-        city_high_risk = high_risk[high_risk['Incident_City'] == city]
+        city_high_risk = by_city.get_group(city)
         print(f"\n{city} (n={len(city_high_risk)} high-risk cases):")
         incidents = city_high_risk['Primary_Impression'].value_counts().head(5)
         for idx, (incident, count) in enumerate(incidents.items(), 1):
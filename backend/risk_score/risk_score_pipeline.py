@@ -31,7 +31,6 @@ try:
 except Exception:
     _HAS_LGB = False
 
-from tqdm import tqdm
 from llm_client import LLMClient
 
 # ------------------------- CONFIG -------------------------
@@ -68,12 +67,14 @@ def preprocess_age(age):
         return "adult"
     return "elderly"
 
+# Whitespace/punctuation -> "_", then runs of "_" collapsed: together every
+# run of characters outside [0-9a-z] becomes a single "_"
+_NON_ALNUM_RUN_RE = re.compile(r"[^0-9a-z]+")
+
 def safe_name(s: str) -> str:
     s = str(s)
     s = s.strip().lower()
-    s = re.sub(r"\s+", "_", s)
-    s = re.sub(r"[^0-9a-z_]", "_", s)
-    s = re.sub(r"_+", "_", s)
+    s = _NON_ALNUM_RUN_RE.sub("_", s)
     if s == "":
         s = "na"
     return s
@@ -97,7 +98,9 @@ def make_unique(names):
 
 # --------------------- BUILD MEDICAL TEXT ---------------------
 def build_medical_text(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+    # Shallow copy: only whole columns are added/replaced below, which never
+    # writes into the caller's arrays, so there's no need to duplicate them
+    df = df.copy(deep=False)
     df["primary_impression"] = df.get("Primary_Impression", "").fillna("").astype(str)
     df["protocol_used"] = df.get("Protocol_Used_by_EMS_Personnel", "").fillna("").astype(str)
     df["Patient_Age"] = df.get("Patient_Age", pd.Series([np.nan]*len(df)))
@@ -168,18 +171,18 @@ def run_pipeline(input_csv: str, out_dir: str):
     print(f"Clustered {len(df):,} rows into {N_CLUSTERS} clusters")
 
     print(f"\n=== STEP 2: LLM SUMMARIZATION & LABELING ===")
-    # Sample and summarize clusters
+    # Sample and summarize clusters (all LLM calls in flight together)
     cluster_samples = sample_clusters(df, samples_per_cluster=SAMPLES_PER_CLUSTER)
+    print(f"LLM cluster summarization: {len(cluster_samples)} clusters")
+    try:
+        summaries = llm.summarize_clusters(cluster_samples)
+    except Exception as e:
+        print(f"LLM summarization failed: {e}")
+        summaries = {cid: "[ERROR]" for cid in cluster_samples}
+
     cluster_summaries = {}
-    for cid, samples in tqdm(cluster_samples.items(), desc="LLM cluster summarization"):
-        try:
-            summary = llm.summarize_cluster(samples=samples, cluster_id=cid)
-            if not summary:
-                summary = "[NO LLM RESPONSE]"
-        except Exception as e:
-            print(f"LLM summarization failed for cluster {cid}: {e}")
-            summary = "[ERROR]"
-        cluster_summaries[int(cid)] = {"summary": summary}
+    for cid, summary in summaries.items():
+        cluster_summaries[int(cid)] = {"summary": summary or "[NO LLM RESPONSE]"}
 
     summaries_path = os.path.join(out_dir, "cluster_summaries.json")
     with open(summaries_path, "w", encoding="utf-8") as fh:
@@ -336,7 +339,7 @@ def run_pipeline(input_csv: str, out_dir: str):
     cm_df.to_csv(os.path.join(out_dir, "confusion_matrix.csv"))
 
     # Misclassified
-    test_orig = df_test.copy()
+    test_orig = df_test.copy(deep=False)  # only new columns are added
     test_orig["_pred_label"] = y_pred
     test_orig["_pred_prob_LOW"] = y_pred_prob[:,0]
     test_orig["_pred_prob_MEDIUM"] = y_pred_prob[:,1]
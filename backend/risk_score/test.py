@@ -1,10 +1,24 @@
 import pandas as pd
 import numpy as np
-import json
+import orjson
 from sklearn.decomposition import PCA
 from umap import UMAP
 from joblib import load
 
+# RAPIDS cuML: same UMAP/PCA estimators, fitted on the GPU
+try:
+    import cupy
+    from cuml.manifold import UMAP as GPUUMAP
+    from cuml.decomposition import PCA as GPUPCA
+    _HAS_CUML = True
+except Exception:
+    _HAS_CUML = False
+
+def write_json(obj, path):
+    # orjson: C encoder, numpy scalars serialized natively; 64KB write buffer
+    with open(path, "wb", buffering=1 << 16) as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+
 def generate_dashboard_jsons(
     clustering_method: str = "umap",  # "umap" or "pca"
     max_points_per_cluster: int = 50
@@ -20,28 +34,34 @@ def generate_dashboard_jsons(
 
     # --- 1️⃣ Cluster embeddings ---
     if clustering_method.lower() == "umap":
-        reducer = UMAP(n_components=2, random_state=42)
+        reducer = (GPUUMAP if _HAS_CUML else UMAP)(n_components=2, random_state=42)
     elif clustering_method.lower() == "pca":
-        reducer = PCA(n_components=2)
+        reducer = (GPUPCA if _HAS_CUML else PCA)(n_components=2)
     else:
         raise ValueError("clustering_method must be 'umap' or 'pca'")
 
-    embeddings = reducer.fit_transform(features)
+    if _HAS_CUML:
+        # float32 device copy in, host numpy array back out
+        embeddings = reducer.fit_transform(cupy.asarray(np.asarray(features, dtype=np.float32))).get()
+    else:
+        embeddings = reducer.fit_transform(features)
     df_emb = pd.DataFrame(embeddings, columns=["x", "y"])
     df_emb["risk_label"] = df["risk_label"]
     df_emb["cluster_id"] = df["cluster_id"] if "cluster_id" in df.columns else 0
 
-    # Sample points per cluster
-    sampled_embs = (
-        df_emb.groupby("cluster_id")
-        .apply(lambda x: x.sample(n=min(len(x), max_points_per_cluster), random_state=42))
-        .reset_index(drop=True)
-    )
+    # Sample points per cluster: draw row positions per group, then take
+    # all of them with one iloc instead of a DataFrame.sample per group
+    rng = np.random.default_rng(42)
+    groups = df_emb.groupby("cluster_id").indices
+    picks = np.concatenate([
+        rng.choice(idx, size=min(len(idx), max_points_per_cluster), replace=False)
+        for idx in groups.values()
+    ])
+    sampled_embs = df_emb.iloc[picks].reset_index(drop=True)
 
     # Save cluster embeddings JSON
     cluster_json = sampled_embs.to_dict(orient="records")
-    with open(f"{output_dir}/cluster_embeddings.json", "w") as f:
-        json.dump(cluster_json, f, indent=2)
+    write_json(cluster_json, f"{output_dir}/cluster_embeddings.json")
 
     # --- 2️⃣ Top 5 protocols per risk ---
     top_protocols = (
@@ -55,8 +75,7 @@ def generate_dashboard_jsons(
         label: grp[["Protocol_Used_by_EMS_Personnel", "count"]].to_dict(orient="records")
         for label, grp in top_protocols.groupby("risk_label")
     }
-    with open(f"{output_dir}/top_protocols.json", "w") as f:
-        json.dump(top_protocols_json, f, indent=2)
+    write_json(top_protocols_json, f"{output_dir}/top_protocols.json")
 
     # --- 3️⃣ Top 5 primary impressions per risk ---
     top_impressions = (
@@ -70,13 +89,11 @@ def generate_dashboard_jsons(
         label: grp[["primary_impression", "count"]].to_dict(orient="records")
         for label, grp in top_impressions.groupby("risk_label")
     }
-    with open(f"{output_dir}/top_primary_impressions.json", "w") as f:
-        json.dump(top_impressions_json, f, indent=2)
+    write_json(top_impressions_json, f"{output_dir}/top_primary_impressions.json")
 
     # --- 4️⃣ Label distribution ---
     label_dist = df["risk_label"].value_counts().to_dict()
-    with open(f"{output_dir}/label_distribution.json", "w") as f:
-        json.dump(label_dist, f, indent=2)
+    write_json(label_dist, f"{output_dir}/label_distribution.json")
 
     print("✅ Dashboard JSON files generated in:", output_dir)
 
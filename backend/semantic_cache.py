@@ -0,0 +1,168 @@
+# semantic_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+    _HAS_ST = True
+except Exception:
+    _HAS_ST = False
+
+# Same embedder as the RAG store (risk_score/rag_store/rag_pipeline.py)
+EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def load_default_embedder() -> Optional[Callable[[str], np.ndarray]]:
+    """
+    Lazily-loaded sentence-transformer embed function, or None when
+    sentence-transformers isn't installed (exact-match caching only).
+    """
+    if not _HAS_ST:
+        return None
+
+    model = None
+    lock = threading.Lock()
+
+    def embed(text: str) -> np.ndarray:
+        nonlocal model
+        with lock:
+            if model is None:
+                model = SentenceTransformer(EMBED_MODEL_NAME)
+        return model.encode(text, convert_to_numpy=True, show_progress_bar=False)
+
+    return embed
+
+
+class SemanticCache:
+    """
+    Answer cache for repeated / paraphrased LLM questions.
+
+    - Exact layer: blake2b(mode + prompt) -> answer.
+    - Semantic layer: L2-normalized embeddings of the user message, each with
+      an n_bits random-projection (SimHash) signature. A lookup only
+      dot-products entries whose signature is within max_hamming bits, and
+      returns a hit when cosine >= threshold for the same mode.
+
+    Passing message=None uses the exact layer only. Both layers are bounded
+    to max_entries with least-recently-used eviction.
+    """
+
+    def __init__(
+        self,
+        embed: Optional[Callable[[str], np.ndarray]] = None,
+        threshold: float = 0.95,
+        n_bits: int = 16,
+        max_hamming: int = 2,
+        max_entries: int = 1024,
+        seed: int = 0,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.n_bits = n_bits
+        self.max_hamming = max_hamming
+        self.max_entries = max_entries
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._tick = 0
+
+        # Exact layer: key -> answer, in least-recently-used order
+        self._exact = OrderedDict()
+
+        # Semantic layer: fixed-capacity arrays, allocated on first insert
+        self._planes = None
+        self._bit_weights = np.left_shift(np.uint64(1), np.arange(n_bits, dtype=np.uint64))
+        self._embs = None
+        self._sigs = np.zeros(max_entries, dtype=np.uint64)
+        self._used = np.zeros(max_entries, dtype=np.int64)
+        self._modes = [None] * max_entries
+        self._answers = [None] * max_entries
+        self._size = 0
+
+    # -------------------------------------------------------------------
+    # Keys / signatures
+    # -------------------------------------------------------------------
+    @staticmethod
+    def _key(mode: str, prompt: str) -> bytes:
+        return hashlib.blake2b(f"{mode}\0{prompt}".encode("utf-8"), digest_size=16).digest()
+
+    def _embed(self, message: Optional[str]) -> Optional[np.ndarray]:
+        if self.embed is None or message is None:
+            return None
+        vec = np.asarray(self.embed(message), dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else None
+
+    def _signature(self, vec: np.ndarray) -> np.uint64:
+        # One bit per random hyperplane: which side of it the vector is on
+        bits = (self._planes @ vec) > 0
+        return np.bitwise_or.reduce(self._bit_weights[bits])
+
+    # -------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------
+    def get(self, mode: str, message: Optional[str], prompt: str) -> Optional[str]:
+        key = self._key(mode, prompt)
+        with self._lock:
+            self._tick += 1
+            if key in self._exact:
+                self._exact.move_to_end(key)
+                return self._exact[key]
+            if self._embs is None or self._size == 0:
+                return None
+
+        vec = self._embed(message)
+        if vec is None:
+            return None
+
+        with self._lock:
+            n = self._size
+            sig = self._signature(vec)
+            # Hamming distance via popcount of the XORed signatures
+            diff = np.bitwise_xor(self._sigs[:n], sig)
+            hamming = np.unpackbits(diff.view(np.uint8)).reshape(n, 64).sum(axis=1)
+            candidates = np.flatnonzero(hamming <= self.max_hamming)
+            if candidates.size == 0:
+                return None
+
+            sims = self._embs[candidates] @ vec
+            for j in np.argsort(-sims):
+                if sims[j] < self.threshold:
+                    break
+                i = candidates[j]
+                if self._modes[i] == mode:
+                    self._used[i] = self._tick
+                    return self._answers[i]
+        return None
+
+    def put(self, mode: str, message: Optional[str], prompt: str, answer: str) -> None:
+        key = self._key(mode, prompt)
+        vec = self._embed(message)
+
+        with self._lock:
+            self._tick += 1
+            self._exact[key] = answer
+            self._exact.move_to_end(key)
+            if len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+
+            if vec is None:
+                return
+            if self._embs is None:
+                self._planes = self._rng.standard_normal((self.n_bits, vec.size)).astype(np.float32)
+                self._embs = np.zeros((self.max_entries, vec.size), dtype=np.float32)
+
+            if self._size < self.max_entries:
+                i = self._size
+                self._size += 1
+            else:
+                i = int(np.argmin(self._used))
+
+            self._embs[i] = vec
+            self._sigs[i] = self._signature(vec)
+            self._used[i] = self._tick
+            self._modes[i] = mode
+            self._answers[i] = answer
@@ -1,8 +1,10 @@
 from pathlib import Path
-import json
+import orjson
+import numpy as np
 import pandas as pd
 from ollama import chat as ollama_chat  # Gemma 7B Instruct API
 from typing import List
+from sklearn.feature_extraction.text import TfidfVectorizer
 
 # Paths
 RAG_STORE_PATH = Path(r"C:\Users\SAHARA\OneDrive\Desktop\uni\gemma\risk_score\rag_store")
@@ -12,30 +14,62 @@ CSV_PATH = Path(r"C:\Users\SAHARA\OneDrive\Desktop\uni\gemma\eda\eda.csv")
 df = pd.read_csv(CSV_PATH)
 df.fillna("", inplace=True)
 
+# Lowercased once for the case-insensitive filters, and age -> row positions
+_pi_lower = df["Primary_Impression"].astype(str).str.lower()
+_city_lower = df["Incident_City"].astype(str).str.lower()
+_age_index = df.groupby("Patient_Age").indices
+
+# Protocol texts, read once per RAG store file
+def load_protocols() -> List[str]:
+    protocols = []
+    for file in RAG_STORE_PATH.glob("*.json"):
+        with open(file, "rb", buffering=1 << 16) as f:
+            data = orjson.loads(f.read())
+        # data["text"] contains the protocol/SOP
+        protocols.append(data.get("text", ""))
+    return protocols
+
+# TF-IDF over unigrams + bigrams; rows are L2-normalized, so a query's
+# cosine similarity to every protocol is one sparse mat-vec
+def build_protocol_index(protocols: List[str]):
+    if not protocols:
+        return None, None
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, stop_words="english")
+    return vectorizer, vectorizer.fit_transform(protocols)
+
+_PROTOCOLS = load_protocols()
+_VECTORIZER, _DOC_MATRIX = build_protocol_index(_PROTOCOLS)
+
+def invalidate_cache() -> None:
+    """Re-read the RAG store (e.g. after files were added or changed)."""
+    global _PROTOCOLS, _VECTORIZER, _DOC_MATRIX
+    _PROTOCOLS = load_protocols()
+    _VECTORIZER, _DOC_MATRIX = build_protocol_index(_PROTOCOLS)
+
 # Function to retrieve top protocols/SOP snippets from RAG store
 def retrieve_protocols(query: str, top_k: int = 5) -> List[str]:
-    """Retrieve top-k relevant protocol snippets from JSON/embeddings store."""
-    snippets = []
-    # For simplicity, assume each file in RAG_STORE_PATH is a JSON with text
-    for file in RAG_STORE_PATH.glob("*.json"):
-        with open(file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # data["text"] contains the protocol/SOP
-            if query.lower() in data.get("text", "").lower():
-                snippets.append(data["text"])
-    return snippets[:top_k]
+    """Retrieve the top-k protocol snippets by TF-IDF cosine similarity."""
+    if _VECTORIZER is None or top_k <= 0:
+        return []
+    scores = (_DOC_MATRIX @ _VECTORIZER.transform([query]).T).toarray().ravel()
+    k = min(top_k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    # Protocols sharing no terms with the query score 0
+    return [_PROTOCOLS[i] for i in top if scores[i] > 0]
 
 # Function to summarize relevant patient data for prompt
 def get_patient_summary(age=None, symptom=None, city=None, top_n=5) -> str:
-    df_filtered = df
     if age:
-        df_filtered = df_filtered[df_filtered["Patient_Age"] == age]
+        rows = _age_index.get(age, np.array([], dtype=np.intp))
+    else:
+        rows = np.arange(len(df))
     if symptom:
-        df_filtered = df_filtered[df_filtered["Primary_Impression"].str.contains(symptom, case=False)]
+        rows = rows[_pi_lower.iloc[rows].str.contains(symptom.lower(), regex=False).to_numpy()]
     if city:
-        df_filtered = df_filtered[df_filtered["City"].str.contains(city, case=False)]
-    summary = df_filtered.head(top_n).to_dict(orient="records")
-    return json.dumps(summary, indent=2)
+        rows = rows[_city_lower.iloc[rows].str.contains(city.lower(), regex=False).to_numpy()]
+    summary = df.iloc[rows[:top_n]].to_dict(orient="records")
+    return orjson.dumps(summary, option=orjson.OPT_INDENT_2).decode()
 
 # Function to construct prompt
 def construct_prompt(user_query: str, protocols: List[str], patient_summary: str) -> str:
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Check request coalescing in ask_llm: callers asking the same prompt share
+one generation, and a caller that is cancelled (client disconnect) doesn't
+cancel it for the others.
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from semantic_cache import SemanticCache
+
+class FakeLLM:
+    """Stands in for llm_client.aask: counts calls, answers after a delay."""
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.calls = 0
+        self.cancelled = 0
+
+    async def aask(self, prompt, instructions=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"answer to {prompt}"
+
+def use_fake_llm() -> FakeLLM:
+    fake = FakeLLM()
+    main.llm_client.aask = fake.aask
+    # Exact-match cache only, empty for each check
+    main.answer_cache = SemanticCache(embed=None)
+    return fake
+
+async def one_cancelled_one_surviving():
+    fake = use_fake_llm()
+    leader = asyncio.create_task(main.ask_llm("chat", "hi", "prompt A", "sys"))
+    await asyncio.sleep(0.05)
+    follower = asyncio.create_task(main.ask_llm("chat", "hi", "prompt A", "sys"))
+    await asyncio.sleep(0.05)
+
+    leader.cancel()
+    answer = await follower
+
+    assert leader.cancelled()
+    assert answer == "answer to prompt A", answer
+    assert fake.calls == 1 and fake.cancelled == 0, (fake.calls, fake.cancelled)
+    assert not main.INFLIGHT
+    print("[OK] cancelled leader, follower still answered from one generation")
+
+async def all_callers_cancelled():
+    fake = use_fake_llm()
+    first = asyncio.create_task(main.ask_llm("chat", "hi", "prompt B", "sys"))
+    second = asyncio.create_task(main.ask_llm("chat", "hi", "prompt B", "sys"))
+    await asyncio.sleep(0.05)
+    first.cancel()
+    second.cancel()
+    await asyncio.sleep(0.01)
+
+    assert fake.calls == 1 and fake.cancelled == 1, (fake.calls, fake.cancelled)
+    assert not main.INFLIGHT
+
+    # A new caller starts a fresh generation rather than joining the cancelled one
+    answer = await main.ask_llm("chat", "hi", "prompt B", "sys")
+    assert answer == "answer to prompt B" and fake.calls == 2, (answer, fake.calls)
+    print("[OK] generation cancelled once every caller left; next caller regenerates")
+
+def test_one_cancelled_one_surviving():
+    asyncio.run(one_cancelled_one_surviving())
+
+def test_all_callers_cancelled():
+    asyncio.run(all_callers_cancelled())
+
+if __name__ == "__main__":
+    test_one_cancelled_one_surviving()
+    test_all_callers_cancelled()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Regression check: "how many ..." answers count the same incidents as
+df[COL_IMPRESSION].str.contains(term, case=False) over the full dataset.
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from main import df, COL_IMPRESSION, count_impressions_matching, handle_compute
+
+TERMS = [
+    "chest pain", "chest pain?", "overdose?", "seizure?", "seizure",
+    "stroke", "fall", "cardiac arrest.", "breathing", "pain!",
+]
+
+def test_counts_match_str_contains():
+    for term in TERMS:
+        expected = int(df[COL_IMPRESSION].astype(str).str.contains(term, case=False, na=False).sum())
+        got = count_impressions_matching(term)
+        assert got == expected, f"{term!r}: {got} != {expected}"
+        print(f"[OK] {term!r}: {got:,}")
+
+def test_how_many_answers():
+    for term in ["chest pain?", "overdose?", "seizure?"]:
+        expected = int(df[COL_IMPRESSION].astype(str).str.contains(term, case=False, na=False).sum())
+        answer = handle_compute(f"how many {term}")
+        assert f"There are {expected:,} incidents matching" in answer, answer
+        print(f"[OK] how many {term} -> {answer}")
+
+if __name__ == "__main__":
+    test_counts_match_str_contains()
+    test_how_many_answers()
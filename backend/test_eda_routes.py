@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Check that /eda/kpis.json serves eda/outputs/kpis.json, the file the EDA
+page reads (most_common_injury_place etc.).
+"""
+
+import sys
+import json
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fastapi.testclient import TestClient
+from main import app, EDA_OUTPUT_DIR
+
+def test_eda_kpis_served_from_file():
+    client = TestClient(app)
+    res = client.get("/eda/kpis.json")
+    assert res.status_code == 200, res.status_code
+    expected = json.loads((EDA_OUTPUT_DIR / "kpis.json").read_bytes())
+    assert res.json() == expected, res.json()
+    assert "most_common_injury_place" in res.json()
+    print(f"[OK] /eda/kpis.json -> {sorted(expected)}")
+
+if __name__ == "__main__":
+    test_eda_kpis_served_from_file()
@@ -1,24 +1,40 @@
 import pandas as pd
+import pyarrow.csv as pa_csv
 import os
 
 FILE_PATH = r"C:\Users\SAHARA\Downloads\Emergency_Medical_Service_(EMS)_Incidents_20251121.csv"
 OUTPUT_PATH = r"C:\Users\SAHARA\OneDrive\Desktop\uni\gemma\cleaning\cleaned_ems_outputf.csv"
 
+# Timestamps in the raw export, e.g. "01/02/2021 05:11:00 PM"
+RAW_TIMESTAMP_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
 def clean_ems_dataset():
     print("[INFO] Loading dataset...")
-    df = pd.read_csv(FILE_PATH)
+    # Arrow's multithreaded CSV reader; timestamp columns in the export's
+    # format (or ISO 8601) arrive already parsed, so step 2 only has to
+    # coerce the ones that didn't match. Empty strings are read as missing,
+    # as pandas does, so the fills below still apply.
+    table = pa_csv.read_csv(
+        FILE_PATH,
+        read_options=pa_csv.ReadOptions(block_size=1 << 20, use_threads=True),
+        convert_options=pa_csv.ConvertOptions(
+            timestamp_parsers=[RAW_TIMESTAMP_FORMAT, pa_csv.ISO8601],
+            strings_can_be_null=True,
+        ),
+    )
+    df = table.to_pandas()
     print("[INFO] Original shape:", df.shape)
 
     # --------------------------------------------------
-# 0. Remove duplicates
-# --------------------------------------------------
-print("[INFO] Checking for duplicates...")
+    # 0. Remove duplicates
+    # --------------------------------------------------
+    print("[INFO] Checking for duplicates...")
 
-if "Incident_Number" in df.columns and "Time_Call_Was_Received" in df.columns:
-    before = df.shape[0]
-    df = df.drop_duplicates(subset=["Incident_Number", "Time_Call_Was_Received"])
-    after = df.shape[0]
-    print(f"[INFO] Removed {before - after} duplicates (Incident_Number + Time_Call).")
+    if "Incident_Number" in df.columns and "Time_Call_Was_Received" in df.columns:
+        before = df.shape[0]
+        df = df.drop_duplicates(subset=["Incident_Number", "Time_Call_Was_Received"])
+        after = df.shape[0]
+        print(f"[INFO] Removed {before - after} duplicates (Incident_Number + Time_Call).")
 
     # --------------------------------------------------
     # 1. Clean column names
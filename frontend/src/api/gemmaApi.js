@@ -12,9 +12,16 @@ async function apiGet(endpoint, fallback = null) {
   }
 }
 
-// Dataset pagination
-export const fetchDatasetPage = async (page = 1, limit = 25) =>
-  apiGet(`/dataset?page=${page}&limit=${limit}`, { rows: [], total_rows: 0, page: 1, total_pages: 1 });
+// Dataset pagination (fetched as column arrays, rebuilt into row objects)
+export const fetchDatasetPage = async (page = 1, limit = 25) => {
+  const res = await apiGet(`/dataset?page=${page}&limit=${limit}&format=columns`, null);
+  if (!res) return { rows: [], total_rows: 0, page: 1, total_pages: 1 };
+  const { columns, data, ...meta } = res;
+  const rows = (data[0] || []).map((_, i) =>
+    Object.fromEntries(columns.map((col, c) => [col, data[c][i]]))
+  );
+  return { rows, ...meta };
+};
 
 // Fetch EDA JSON outputs
 export const fetchEdaJson = (filename) => apiGet(`/eda/${filename}`, []);